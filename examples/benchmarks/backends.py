@@ -0,0 +1,40 @@
+"""
+Hot call throughput of the ctypes and cffi backends.
+Each backend is measured in its own interpreter,
+since the backend is selected at import time.
+Run from the repository root: python examples/benchmarks/backends.py
+"""
+import sys
+from os import environ
+from subprocess import run
+from timeit import timeit
+
+
+N = 500_000
+
+
+def measure():
+    from python_chakra import JSRuntime, create_object, get_property, \
+        js_true, to_double, to_number, typeof
+    from python_chakra.utils import backend
+
+    with JSRuntime():
+        obj = create_object({"key": js_true})
+        number = to_number(42)
+        cases = {
+            "typeof": lambda: typeof(obj),
+            "to_double": lambda: to_double(number),
+            "get_property": lambda: get_property(obj, "key"),
+        }
+        for name, case in cases.items():
+            elapsed = timeit(case, number=N)
+            print(f"{backend:<8}{name:<14}{elapsed / N * 1e9:>10.0f} ns/call")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        measure()
+    else:
+        for backend in ("ctypes", "cffi"):
+            run([sys.executable, __file__, "measure"],
+                env={**environ, "PYTHON_CHAKRA_BACKEND": backend})
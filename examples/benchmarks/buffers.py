@@ -0,0 +1,41 @@
+"""
+Moving megabytes of binary data between python and JS:
+copying into engine-owned ArrayBuffers versus sharing memory
+through external ArrayBuffers and reading storage as memoryviews.
+Run from the repository root: python examples/benchmarks/buffers.py
+"""
+from time import perf_counter
+
+from python_chakra import ArrayBuffer, JSRuntime, TypedArray, to_js, \
+    to_python
+
+
+SIZE = 16 * 2 ** 20
+ROUNDS = 20
+
+
+def timed(name: str, function) -> None:
+    start = perf_counter()
+    for _ in range(ROUNDS):
+        with runtime.handle_scope():
+            function()
+    elapsed = (perf_counter() - start) / ROUNDS
+    print(f"{name:<24} {elapsed * 1e3:8.2f} ms "
+          f"({SIZE / elapsed / 2 ** 30:6.1f} GiB/s)")
+
+
+with JSRuntime() as runtime:
+    data = bytearray(SIZE)
+    fill = runtime.compile("new Uint8Array(buffer).fill(7)", "fill",
+                           params=("buffer",))
+    timed("copy to JS", lambda: to_js(data))
+    timed("share with JS", lambda: ArrayBuffer(data))
+    buffer = ArrayBuffer(SIZE)
+    fill(buffer)
+    timed("copy to python", lambda: to_python(buffer))
+    timed("view from python", lambda: bytes(buffer.as_memoryview()[:1]))
+    shared = ArrayBuffer(data)
+    fill(shared)
+    assert data[-1] == 7, "JS writes are visible in python"
+    doubles = TypedArray(memoryview(data).cast("d"))
+    print(f"{len(doubles)} doubles shared as {doubles.kind.name}Array")
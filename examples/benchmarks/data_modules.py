@@ -0,0 +1,48 @@
+"""
+Import time of large JSON / YAML / TOML data modules emitted
+as object literals versus a single `JSON.parse` of a string literal.
+Run from the repository root: python examples/benchmarks/data_modules.py
+"""
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import toml
+import yaml
+
+from python_chakra import JSRuntime
+from python_chakra.modules import _ModuleEmitter
+
+
+def fixture(records: int) -> dict:
+    return {
+        "name": "fixture",
+        "records": [{"id": i, "label": f"item \"{i}\"\nline",
+                     "score": i / 7, "tags": ["a", "b", "ü"],
+                     "active": i % 2 == 0} for i in range(records)],
+    }
+
+
+def run(path: Path) -> float:
+    start = perf_counter()
+    with JSRuntime() as runtime:
+        runtime.exec_module(path.as_uri())
+    return perf_counter() - start
+
+
+with TemporaryDirectory() as directory:
+    data = fixture(40_000)
+    dumpers = {"json": json.dumps, "yaml": yaml.safe_dump, "toml": toml.dumps}
+    for extension, dump in dumpers.items():
+        source = Path(directory, f"fixture.{extension}")
+        source.write_text(dump(data), encoding="utf8")
+        size = source.stat().st_size / 2 ** 20
+        literal = Path(directory, f"{extension}-literal.js")
+        literal.write_text(_ModuleEmitter.emit_literal(data), encoding="utf8")
+        parsed = Path(directory, f"{extension}-json.js")
+        parsed.write_text(_ModuleEmitter.emit(data), encoding="utf8")
+        print(f"{extension} ({size:.1f} MiB): "
+              f"literal {run(literal) * 1e3:.0f} ms, "
+              f"JSON.parse {run(parsed) * 1e3:.0f} ms, "
+              f"import {run(source) * 1e3:.0f} ms")
@@ -0,0 +1,34 @@
+"""
+Per-call overhead of untyped `CDLL` attribute calls
+versus the typed prototype table used by the wrapper.
+Run from the repository root: python examples/benchmarks/ffi_prototypes.py
+"""
+from ctypes import CDLL, byref, c_int, c_void_p
+from timeit import timeit
+
+from python_chakra import *
+from python_chakra.utils import chakra_core, library_path
+
+
+N = 500_000
+untyped = CDLL(library_path)
+
+
+with JSRuntime():
+    obj = create_object({"key": js_true})
+    prop_id = property_ids["key"]
+    function = js_eval("(function () {})")
+    args = (c_void_p * 1)(js_undefined)
+    result = c_void_p()
+    T = c_int()
+    for label, dll in (("untyped", untyped), ("typed", chakra_core)):
+        cases = {
+            "JsGetProperty": lambda: dll.JsGetProperty(obj, prop_id,
+                                                       byref(result)),
+            "JsCallFunction": lambda: dll.JsCallFunction(function, args, 1,
+                                                         byref(result)),
+            "JsGetValueType": lambda: dll.JsGetValueType(obj, byref(T)),
+        }
+        for name, case in cases.items():
+            elapsed = timeit(case, number=N)
+            print(f"{label:<8}{name:<16}{elapsed / N * 1e9:>10.0f} ns/call")
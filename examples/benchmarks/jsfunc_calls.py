@@ -0,0 +1,39 @@
+"""
+Overhead of calling small jsfuncs from a tight JS loop.
+Run from the repository root: python examples/benchmarks/jsfunc_calls.py
+"""
+from time import perf_counter
+
+from python_chakra import JSRuntime, jsfunc
+
+
+CALLS = 200_000
+
+
+@jsfunc(attach_to_global_as=True)
+def nothing() -> None:
+    pass
+
+
+@jsfunc(attach_to_global_as=True)
+def identity(value):
+    return value
+
+
+@jsfunc(attach_to_global_as=True)
+def flag(value) -> bool:
+    return value is not None
+
+
+@jsfunc(attach_to_global_as=True)
+def with_this(value, *, this):
+    return this
+
+
+with JSRuntime() as runtime:
+    for call in ("nothing()", "identity(i)", "flag(i)", "with_this(i)"):
+        loop = runtime.compile(f"for (var i = 0; i < {CALLS}; i++) {call};")
+        start = perf_counter()
+        loop()
+        elapsed = perf_counter() - start
+        print(f"{call:<14} {elapsed / CALLS * 1e9:8.0f} ns / call")
@@ -0,0 +1,43 @@
+"""
+Numeric-heavy jsfuncs working with `Number`s, such as the example's `sum`.
+Arithmetic between `Number`s stays in python, JS values are only created
+for the results returned to JS.
+Run from the repository root: python examples/benchmarks/numbers.py
+"""
+from time import perf_counter
+
+from python_chakra import JSRuntime, Number, jsfunc
+
+
+CALLS = 200_000
+
+
+@jsfunc(attach_to_global_as=True)
+def sum(a, b):
+    return Number(a) + Number(b)
+
+
+@jsfunc(attach_to_global_as=True)
+def polynomial(x):
+    x = Number(x)
+    result = Number(0)
+    for coefficient in (3, -2, 0.5, 7):
+        result *= x
+        result += coefficient
+    return result
+
+
+with JSRuntime() as runtime:
+    for call in ("sum(i, 1)", "sum(i, 0.5)", "polynomial(i)"):
+        loop = runtime.compile(f"for (var i = 0; i < {CALLS}; i++) {call};")
+        start = perf_counter()
+        loop()
+        elapsed = perf_counter() - start
+        print(f"{call:<14} {elapsed / CALLS * 1e9:8.0f} ns / call")
+    start = perf_counter()
+    total = Number(0)
+    for i in range(CALLS):
+        total += Number(i) * 0.5
+    elapsed = perf_counter() - start
+    print(f"{'python only':<14} {elapsed / CALLS * 1e9:8.0f} ns / step "
+          f"(total {total.value:.0f})")
@@ -0,0 +1,49 @@
+"""
+Exchanging NumPy arrays with JS: one number per native call
+versus TypedArrays sharing the ndarray's memory.
+Run from the repository root: python examples/benchmarks/numpy_arrays.py
+"""
+from time import perf_counter
+
+import numpy
+
+from python_chakra import JSRuntime, Object, TypedArray, to_js, to_numpy
+from python_chakra.dll_wrapper import create_array, get_property, \
+    set_property, to_double, to_number
+
+
+SIZE = 1_000_000
+
+
+def timed(name: str, function):
+    start = perf_counter()
+    result = function()
+    print(f"{name:<28} {(perf_counter() - start) * 1e3:10.2f} ms")
+    return result
+
+
+def per_number(values: numpy.ndarray) -> Object:
+    array = Object(create_array(len(values)))
+    for index, value in enumerate(values.tolist()):
+        set_property(array, index, to_number(value))
+    return array
+
+
+def features(array) -> numpy.ndarray:
+    return numpy.array([to_double(get_property(array, index))
+                        for index in range(SIZE)])
+
+
+with JSRuntime() as runtime:
+    values = numpy.random.default_rng(0).random(SIZE)
+    scale = runtime.compile("for (var i = 0; i < a.length; i++) a[i] *= 2;"
+                            "return a", "scale", params=("a",))
+    array = timed("to JS, per number", lambda: per_number(values))
+    timed("to python, per number", lambda: features(array))
+    with runtime.handle_scope():
+        shared = timed("to JS, shared Float64Array",
+                       lambda: TypedArray(to_js(values)))
+    scale(shared)
+    result = timed("to python, to_numpy", lambda: to_numpy(shared))
+    assert numpy.array_equal(result, values) and result.base is not None
+    print("JS writes are visible in the ndarray without copies")
@@ -0,0 +1,42 @@
+"""
+Throughput and memory of awaiting pending JS promises from Python.
+Each settlement goes through the single native dispatcher, so neither
+native functions nor callback slots pile up.
+Run from the repository root: python examples/benchmarks/promises.py
+"""
+from asyncio import gather, get_running_loop, run
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+
+from python_chakra import JSRuntime, Promise
+from python_chakra.dll_wrapper import call, create_promise, \
+    settle_callbacks, to_number
+
+
+PROMISES = 100_000
+BATCH = 1_000
+
+
+async def await_promises(runtime: JSRuntime) -> None:
+    loop = get_running_loop()
+    for offset in range(0, PROMISES, BATCH):
+        promises = []
+        for i in range(offset, offset + BATCH):
+            promise, resolve, _ = create_promise()
+            loop.call_soon(call, resolve, to_number(i))
+            promises.append(Promise(promise))
+        await gather(*promises)
+
+
+with JSRuntime() as runtime:
+    start()
+    begin = perf_counter()
+    run(await_promises(runtime))
+    elapsed = perf_counter() - begin
+    _, peak = get_traced_memory()
+    stop()
+    print(f"{PROMISES} awaits in {elapsed:.2f} s "
+          f"({PROMISES / elapsed:,.0f} / s)")
+    print(f"python peak {peak / 2 ** 20:.1f} MiB, "
+          f"engine {runtime.memory_usage() / 2 ** 20:.1f} MiB, "
+          f"callback slots {len(settle_callbacks.callbacks)}")
@@ -0,0 +1,38 @@
+"""
+Property get / set throughput with and without interned property ids.
+Run from the repository root: python examples/benchmarks/property_access.py
+"""
+from ctypes import byref
+from timeit import timeit
+
+from python_chakra import *
+from python_chakra.dll_wrapper import chakra_core, get_property_id_from_str
+
+
+N = 200_000
+
+
+def uncached_get(obj):
+    r = JSValueRef()
+    chakra_core.JsGetProperty(obj, get_property_id_from_str("key"), byref(r))
+    return r
+
+
+def uncached_set(obj, value):
+    chakra_core.JsSetProperty(obj, get_property_id_from_str("key"), value, 1)
+
+
+with JSRuntime():
+    obj = create_object({"key": js_true})
+    key = PropertyAccessor("key")
+    cases = {
+        "get (uncached id)": lambda: uncached_get(obj),
+        "get (interned id)": lambda: get_property(obj, "key"),
+        "get (accessor)": lambda: key.get(obj),
+        "set (uncached id)": lambda: uncached_set(obj, js_false),
+        "set (interned id)": lambda: set_property(obj, "key", js_false),
+        "set (accessor)": lambda: key.set(obj, js_false),
+    }
+    for label, case in cases.items():
+        elapsed = timeit(case, number=N)
+        print(f"{label:<20}{N / elapsed:>14,.0f} ops/s")
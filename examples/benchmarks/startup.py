@@ -0,0 +1,27 @@
+"""
+Latency from `JSRuntime()` to the end of the first `exec_module` call.
+Run from the repository root: python examples/benchmarks/startup.py
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from python_chakra import JSRuntime
+
+
+ROUNDS = 20
+
+
+with TemporaryDirectory() as directory:
+    module = Path(directory, "module.js")
+    module.write_text("export default Promise.resolve(1);\n")
+    timings = []
+    for _ in range(ROUNDS):
+        start = perf_counter()
+        with JSRuntime() as runtime:
+            runtime.exec_module(module.as_uri())
+            timings.append(perf_counter() - start)
+    timings.sort()
+    print(f"min {timings[0] * 1e3:.2f} ms, "
+          f"median {timings[len(timings) // 2] * 1e3:.2f} ms, "
+          f"max {timings[-1] * 1e3:.2f} ms")
@@ -0,0 +1,63 @@
+"""
+Crossover between building containers directly and through `JSON.parse`.
+For each payload size the same data is converted with JSON disabled
+(`parse_threshold=math.inf`) and forced (`parse_threshold=0`),
+the first size where JSON wins is a good `convert.parse_threshold`.
+Run from the repository root: python examples/benchmarks/to_js.py
+"""
+from array import array
+from math import inf
+from time import perf_counter
+
+from python_chakra import JSRuntime, to_js
+
+
+SIZES = 1, 4, 8, 16, 32, 64, 256, 1024, 16384
+BUDGET = 0.25
+
+
+def record(index: int) -> dict:
+    return {"id": index, "name": f"item {index}", "price": index * 0.5,
+            "tags": ["a", "b"], "active": index % 2 == 0}
+
+
+PAYLOADS = {
+    "flat object": lambda size: {f"key{i}": i for i in range(size)},
+    "number list": lambda size: [i * 0.5 for i in range(size)],
+    "records": lambda size: [record(i) for i in range(size)],
+}
+
+
+def measure(payload, threshold: float) -> float:
+    """
+    Returns seconds per conversion
+    """
+    runs = 0
+    start = perf_counter()
+    while True:
+        with runtime.handle_scope():
+            to_js(payload, parse_threshold=threshold)
+        runs += 1
+        elapsed = perf_counter() - start
+        if elapsed > BUDGET:
+            return elapsed / runs
+
+
+with JSRuntime() as runtime:
+    for name, make in PAYLOADS.items():
+        print(name)
+        crossover = None
+        for size in SIZES:
+            payload = make(size)
+            direct = measure(payload, inf)
+            parsed = measure(payload, 0)
+            if crossover is None and parsed < direct:
+                crossover = size
+            print(f"{size:>8} direct {direct * 1e6:10.1f} us, "
+                  f"JSON {parsed * 1e6:10.1f} us")
+        print(f"JSON is faster from {crossover} items\n")
+    numbers = array("d", range(SIZES[-1]))
+    as_list = numbers.tolist()
+    print(f"{len(numbers)} doubles: "
+          f"Float64Array {measure(numbers, inf) * 1e6:.1f} us, "
+          f"JSON array {measure(as_list, 0) * 1e6:.1f} us")
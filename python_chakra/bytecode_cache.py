@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from ctypes import create_string_buffer, string_at
+from hashlib import sha256
+from os import stat
+from typing import Any, Optional, Union
+
+from .dll_wrapper import BadSerializedScriptError, JSValueRef, \
+    buffer_view, create_c_string, create_external_array_buffer, \
+    get_array_buffer_storage, run_script, run_serialized, serialize_script
+from .utils import DiskCache, default_cache_directory, library_path
+
+
+__all__ = "BytecodeCache",
+
+
+def _engine_id() -> str:
+    # ChakraCore doesn't expose its version, so the identity of the
+    # library file is used instead - any rebuild invalidates the cache
+    info = stat(library_path)
+    return f"{info.st_size}:{info.st_mtime_ns}"
+
+
+class BytecodeCache(DiskCache):
+    """
+    On-disk cache of serialized scripts.
+    Entries are keyed by source hash, engine build, runtime flags
+    and parse attributes.
+    Setting `enabled` to `False` makes scripts always be parsed from source
+    """
+    __slots__ = "__engine",
+
+    def __init__(self, directory: Optional[str] = None, *,
+                 max_size: int = 256 * 1024 * 1024,
+                 enabled: bool = True) -> None:
+        super().__init__(directory or default_cache_directory("bytecode"),
+                         max_size=max_size, enabled=enabled)
+        self.__engine = _engine_id()
+
+    def key(self, source: Union[bytes, Any], attributes: int,
+            flags: int = 0) -> str:
+        digest = sha256(f"{self.__engine}:{flags}:{attributes}:".encode())
+        digest.update(source)
+        return digest.hexdigest()
+
+    def run(self, source: Union[bytes, Any], url: str,
+            attributes: int = 0x22, flags: int = 0) -> JSValueRef:
+        """
+        Runs the script, using bytecode from the cache when possible.
+        `source` is bytes or a writable buffer such as `mmap`.
+        Entries rejected by the engine are replaced
+        """
+        script = create_external_array_buffer(buffer_view(source))
+        filename = create_c_string(url)
+        if not self.enabled:
+            return run_script(script, filename, attributes)
+        key = self.key(source, attributes, flags)
+        bytecode = self.read(key)
+        if bytecode is not None:
+            buffer = create_external_array_buffer(
+                create_string_buffer(bytecode, len(bytecode)))
+            try:
+                return run_serialized(buffer, script, filename, attributes)
+            except BadSerializedScriptError:
+                self.delete(key)
+        buffer = serialize_script(script, attributes)
+        self.write(key, string_at(*get_array_buffer_storage(buffer)))
+        return run_script(script, filename, attributes)
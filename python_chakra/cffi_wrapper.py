@@ -0,0 +1,105 @@
+"""
+cffi implementations of the hottest `dll_wrapper` functions.
+They keep the exact signatures and return types of their ctypes
+counterparts and replace them when the cffi backend is selected.
+"""
+from __future__ import annotations
+
+from ctypes import c_void_p, cast
+from typing import Any, Union
+
+from .dll_wrapper import JSValueRef, PropertyAccessor, StrictModeType, \
+    _NumberLike, c_true, descriptive_message, handle_scopes, property_ids, \
+    walk_asparam_chain
+from .utils.cffi_backend import ffi, functions as _lib
+
+__all__ = "typeof", "to_number", "to_double", "to_int", "get_property", \
+    "set_property"
+
+# Out parameters are read right after each call returns,
+# so they can be shared between calls
+_value_out = ffi.new("uintptr_t *")
+_int_out = ffi.new("int *")
+_double_out = ffi.new("double *")
+
+
+def _address(value: Any) -> int:
+    value = walk_asparam_chain(value)
+    if type(value) is JSValueRef:
+        return value.value or 0
+    if value is None:
+        return 0
+    if type(value) is int:
+        return value
+    return cast(value, c_void_p).value or 0
+
+
+def typeof(value: JSValueRef) -> int:
+    c = _lib.JsGetValueType(_address(value), _int_out)
+    assert c == 0, descriptive_message(c, "typeof")
+    return _int_out[0]
+
+
+def _to_number(value: _NumberLike) -> int:
+    if type(value) is JSValueRef or hasattr(value, "contents"):
+        c = _lib.JsConvertValueToNumber(_address(value), _value_out)
+    else:
+        c = _lib.JsDoubleToNumber(float(value), _value_out)
+    assert c == 0, descriptive_message(c, "to_number")
+    return _value_out[0]
+
+
+def to_number(value: _NumberLike) -> JSValueRef:
+    number = JSValueRef(_to_number(value))
+    if handle_scopes:
+        handle_scopes[-1].add(number)
+    return number
+
+
+def to_double(value: _NumberLike) -> float:
+    if type(value) is float or type(value) is int:
+        return float(value)
+    # Numbers are read directly, other values are converted first
+    c = _lib.JsNumberToDouble(_address(value), _double_out)
+    if c != 0:
+        c = _lib.JsNumberToDouble(_to_number(value), _double_out)
+    assert c == 0, descriptive_message(c, "to_double")
+    return _double_out[0]
+
+
+def to_int(value: JSValueRef) -> int:
+    c = _lib.JsNumberToInt(_to_number(value), _int_out)
+    assert c == 0, descriptive_message(c, "to_int")
+    return _int_out[0]
+
+
+def get_property(object: JSValueRef,
+                 prop: Union[str, int, PropertyAccessor]) -> JSValueRef:
+    if type(prop) is int:
+        c = _lib.JsGetIndexedProperty(_address(object), _to_number(prop),
+                                      _value_out)
+    else:
+        if type(prop) is not PropertyAccessor:
+            prop = property_ids[prop]
+        c = _lib.JsGetProperty(_address(object), _address(prop), _value_out)
+    assert c == 0, descriptive_message(c, "get_property")
+    r = JSValueRef(_value_out[0])
+    if handle_scopes:
+        handle_scopes[-1].add(r)
+    return r
+
+
+def set_property(obj: JSValueRef,
+                 key: Union[str, int, PropertyAccessor],
+                 value: JSValueRef, *,
+                 strict_mode: StrictModeType = c_true) -> JSValueRef:
+    if type(key) is str or type(key) is PropertyAccessor:
+        if type(key) is str:
+            key = property_ids[key]
+        c = _lib.JsSetProperty(_address(obj), _address(key),
+                               _address(value), bool(strict_mode))
+    else:
+        c = _lib.JsSetIndexedProperty(_address(obj), _to_number(key),
+                                      _address(value))
+    assert c == 0, descriptive_message(c, "set_property")
+    return obj
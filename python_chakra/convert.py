@@ -0,0 +1,417 @@
+"""
+Conversion between JS values and python values.
+Arrays and objects are read and written with one native call per
+container, large containers of plain data cross the boundary once
+as JSON text: `JSON.stringify` and `json.loads` towards python,
+`json.dumps` and `JSON.parse` towards JS.
+When NumPy is installed, ndarrays and TypedArrays share memory.
+"""
+from __future__ import annotations
+
+from array import array
+from ctypes import byref, c_double, string_at
+from json import dumps, loads
+from math import inf
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .dll_wrapper import HandleScope, JSType, JSTypedArrayType, JSValueRef, \
+    _bulk_results, call, chakra_core, create_array, create_array_buffer, \
+    create_object, create_typed_array, descriptive_message, \
+    get_array_buffer_storage, get_indexed_range, get_properties, \
+    handle_scopes, js_false, js_json_parse, js_null, js_plain_array, \
+    js_plain_object, js_true, js_value_to_string, set_properties, \
+    str_to_js_string, to_int, to_number, typed_array_kind, typeof, \
+    walk_asparam_chain, wrap_buffer
+from .index import ArrayBuffer, DataView, Function, TypedArray
+
+try:
+    import numpy
+except ImportError:
+    # NumPy interop is optional
+    numpy = None
+
+
+__all__ = "Builder", "Converter", "to_js", "to_numpy", "to_python"
+
+# Arrays and objects with at least this many elements go through JSON,
+# `math.inf` disables it
+json_threshold = 1000
+# Same for `to_js`, see examples/benchmarks/to_js.py for the crossover
+parse_threshold = 32
+_MAX_SAFE_INTEGER = 2 ** 53
+# Kept small enough to be a tagged integer, which the GC never collects
+_MAX_THRESHOLD = 0x3fffffff
+_double = c_double()
+
+
+class Converter:
+    """
+    Recursive JS to python conversion dispatched on `typeof`
+    through `converters`. Repeated objects (including cycles) are
+    converted once and shared
+    """
+    __slots__ = "threshold", "seen"
+    threshold: JSValueRef
+    seen: Dict[int, Any]
+
+    def __init__(self, threshold: Optional[float] = None) -> None:
+        if threshold is None:
+            threshold = _default_threshold()
+        if threshold > _MAX_THRESHOLD:
+            threshold = _MAX_THRESHOLD
+        self.threshold = to_number(int(threshold))
+        self.seen = {}
+
+    def convert(self, value: JSValueRef) -> Any:
+        return converters[typeof(value)](self, value)
+
+
+def _default_threshold() -> float:
+    return json_threshold
+
+
+def _none(_: Converter, __: JSValueRef) -> None:
+    return None
+
+
+def _raw(_: Converter, value: JSValueRef) -> JSValueRef:
+    return value
+
+
+def _boolean(_: Converter, value: JSValueRef) -> bool:
+    return value.value == js_true.value
+
+
+def _number(_: Converter, value: JSValueRef) -> Any:
+    c = chakra_core.JsNumberToDouble(value, byref(_double))
+    assert c == 0, descriptive_message(c, "to_python")
+    number = _double.value
+    if number.is_integer() and \
+            -_MAX_SAFE_INTEGER <= number <= _MAX_SAFE_INTEGER:
+        return int(number)
+    return number
+
+
+def _string(_: Converter, value: JSValueRef) -> str:
+    return js_value_to_string(value)
+
+
+def _function(_: Converter, value: JSValueRef) -> Function:
+    return Function(value)
+
+
+def _array_buffer(_: Converter, value: JSValueRef) -> bytes:
+    return string_at(*get_array_buffer_storage(value))
+
+
+def _array(converter: Converter, value: JSValueRef) -> Any:
+    seen = converter.seen
+    if value.value in seen:
+        return seen[value.value]
+    batches = len(_bulk_results)
+    r = call(js_plain_array, value, converter.threshold)
+    if len(_bulk_results) > batches:
+        items = _bulk_results.pop()
+    elif typeof(r) == JSType.string:
+        result = seen[value.value] = loads(js_value_to_string(r))
+        return result
+    else:
+        # Too long for a single native call
+        items = get_indexed_range(value, 0, to_int(r))
+    result: List[Any] = []
+    seen[value.value] = result
+    convert = converter.convert
+    for item in items:
+        result.append(convert(item))
+    return result
+
+
+def _object(converter: Converter, value: JSValueRef) -> Any:
+    seen = converter.seen
+    if value.value in seen:
+        return seen[value.value]
+    batches = len(_bulk_results)
+    r = call(js_plain_object, value, converter.threshold)
+    if len(_bulk_results) > batches:
+        batch = _bulk_results.pop()
+        keys = js_value_to_string(batch[0]).split("\0") \
+            if len(batch) > 1 else []
+        values = batch[1:]
+    elif typeof(r) == JSType.string:
+        result = seen[value.value] = loads(js_value_to_string(r))
+        return result
+    else:
+        # Too many keys for a single native call, or keys containing NUL
+        keys = [js_value_to_string(name) for name in get_indexed_range(r)]
+        values = get_properties(value, keys)
+    result: Dict[str, Any] = {}
+    seen[value.value] = result
+    convert = converter.convert
+    for key, item in zip(keys, values):
+        result[key] = convert(item)
+    return result
+
+
+converters: Dict[int, Callable[[Converter, JSValueRef], Any]] = {
+    JSType.undefined: _none,
+    JSType.null: _none,
+    JSType.number: _number,
+    JSType.string: _string,
+    JSType.boolean: _boolean,
+    JSType.object: _object,
+    JSType.function: _function,
+    JSType.error: _raw,
+    JSType.array: _array,
+    JSType.symbol: _raw,
+    JSType.arraybuffer: _array_buffer,
+    JSType.typedarray: _raw,
+    JSType.dataview: _raw,
+}
+
+
+def to_python(value: Any, *, json_threshold: Optional[float] = None) -> Any:
+    """
+    Converts JS value to python `dict`, `list`, `str`, `int` (integral
+    numbers), `float`, `bool` or `None`, functions become `Function`s,
+    ArrayBuffers become `bytes`, other values are returned as is.\n
+    `json_threshold` - min size of arrays and objects converted through
+    `JSON.stringify` and `json.loads` when they hold plain data only
+    (default: module's `json_threshold`)
+    """
+    value = walk_asparam_chain(value)
+    if type(value) is not JSValueRef:
+        value = JSValueRef(value)
+    return Converter(json_threshold).convert(value)
+
+
+class Builder:
+    """
+    Recursive python to JS conversion dispatched on the type
+    through `builders`. Each value created is pinned in `scope`
+    until the whole tree is attached to its root.
+    Repeated containers (including cycles) are built once and shared,
+    except inside subtrees parsed from JSON
+    """
+    __slots__ = "threshold", "scope", "seen"
+    threshold: float
+    scope: HandleScope
+    seen: Dict[int, JSValueRef]
+
+    def __init__(self, scope: HandleScope,
+                 threshold: Optional[float] = None) -> None:
+        self.threshold = parse_threshold if threshold is None else threshold
+        self.scope = scope
+        self.seen = {}
+
+    def build(self, value: Any) -> JSValueRef:
+        builder = builders.get(type(value))
+        if builder is None:
+            return self.fallback(value)
+        return builder(self, value)
+
+    def fallback(self, value: Any) -> JSValueRef:
+        for kind, builder in builders.items():
+            if isinstance(value, kind):
+                return builder(self, value)
+        ref = walk_asparam_chain(value)
+        if type(ref) is JSValueRef:
+            return ref
+        raise TypeError(f"Cannot convert {type(value).__name__} "
+                        "to JS value")
+
+    def parse(self, value: Any) -> Optional[JSValueRef]:
+        """
+        Builds `value` with one `JSON.parse` call,
+        returns `None` if it holds anything but plain data
+        """
+        try:
+            text = dumps(value, ensure_ascii=False, allow_nan=False,
+                         separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+        # The result is tracked by the scope as every `call` result
+        return call(js_json_parse, self.scope.add(str_to_js_string(text)))
+
+
+def _null(_: Builder, __: None) -> JSValueRef:
+    return js_null
+
+
+def _bool(_: Builder, value: bool) -> JSValueRef:
+    return js_true if value else js_false
+
+
+def _from_number(_: Builder, value: Any) -> JSValueRef:
+    return to_number(value)
+
+
+def _from_str(builder: Builder, value: str) -> JSValueRef:
+    return builder.scope.add(str_to_js_string(value))
+
+
+def _property_key(key: Any) -> Union[str, int]:
+    """
+    Converts dict key the way `json.dumps` does,
+    so objects built directly and through JSON have the same keys
+    """
+    if type(key) is str or type(key) is int:
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, str):
+        return str(key)
+    if isinstance(key, int):
+        return int(key)
+    if isinstance(key, float):
+        if key != key:
+            return "NaN"
+        if key in (inf, -inf):
+            return "Infinity" if key > 0 else "-Infinity"
+        return float.__repr__(key)
+    raise TypeError("Keys of objects must be str, int, float, bool or None, "
+                    f"not {type(key).__name__}")
+
+
+def _dict(builder: Builder, value: Dict[Any, Any]) -> JSValueRef:
+    seen = builder.seen
+    if id(value) in seen:
+        return seen[id(value)]
+    if len(value) >= builder.threshold:
+        result = builder.parse(value)
+        if result is not None:
+            return result
+    result = seen[id(value)] = builder.scope.add(create_object())
+    build = builder.build
+    set_properties(result, {_property_key(key): build(item)
+                            for key, item in value.items()})
+    return result
+
+
+def _list(builder: Builder, value: List[Any]) -> JSValueRef:
+    seen = builder.seen
+    if id(value) in seen:
+        return seen[id(value)]
+    if len(value) >= builder.threshold:
+        result = builder.parse(value)
+        if result is not None:
+            return result
+    result = seen[id(value)] = builder.scope.add(create_array(len(value)))
+    build = builder.build
+    set_properties(result, {index: build(item)
+                            for index, item in enumerate(value)})
+    return result
+
+
+def _bytes(builder: Builder, value: Any) -> JSValueRef:
+    return builder.scope.add(create_array_buffer(value))
+
+
+def _typed_array(builder: Builder, value: array) -> JSValueRef:
+    kind = typed_array_kind(value.typecode, value.itemsize)
+    if kind is None:
+        # 64-bit integers, ChakraCore has no BigInt64Array
+        return _list(builder, value.tolist())
+    buffer = builder.scope.add(create_array_buffer(value))
+    return builder.scope.add(create_typed_array(kind, buffer))
+
+
+def _ndarray(builder: Builder, value: Any) -> JSValueRef:
+    if value.ndim == 0:
+        return builder.build(value.item())
+    if value.dtype == numpy.bool_:
+        value = value.view(numpy.uint8)
+    elif value.dtype.kind not in "iuf":
+        return _list(builder, value.tolist())
+    if not value.dtype.isnative:
+        value = value.astype(value.dtype.newbyteorder("="))
+    # Copies only arrays which aren't C-contiguous
+    value = numpy.ascontiguousarray(value)
+    kind = typed_array_kind(value.dtype.char, value.dtype.itemsize)
+    if kind is None:
+        # 64-bit integers (ChakraCore has no BigInt64Array)
+        # and half floats, JS numbers are doubles anyway
+        value = value.astype(numpy.float64)
+        kind = JSTypedArrayType.Float64
+    buffer = builder.scope.add(wrap_buffer(value))
+    return builder.scope.add(create_typed_array(kind, buffer))
+
+
+def _numpy_scalar(builder: Builder, value: Any) -> JSValueRef:
+    return builder.build(value.item())
+
+
+builders: Dict[type, Callable[[Builder, Any], JSValueRef]] = {
+    type(None): _null,
+    bool: _bool,
+    int: _from_number,
+    float: _from_number,
+    str: _from_str,
+    dict: _dict,
+    list: _list,
+    tuple: _list,
+    bytes: _bytes,
+    bytearray: _bytes,
+    memoryview: _bytes,
+    array: _typed_array,
+}
+if numpy is not None:
+    builders[numpy.ndarray] = _ndarray
+    builders[numpy.generic] = _numpy_scalar
+
+
+def to_js(value: Any, *, parse_threshold: Optional[float] = None) -> \
+        JSValueRef:
+    """
+    Converts python value to JS value: `dict`s become objects,
+    `list`s and `tuple`s become arrays, `str`, `int`, `float` and `bool`
+    become primitives, `None` becomes `null`, `bytes`-like objects are
+    copied into ArrayBuffers and `array.array`s into TypedArrays of the
+    same element type, JS values and their wrappers are passed as is.\n
+    NumPy arrays become TypedArrays sharing their memory (flattened in C
+    order), which stays pinned while the TypedArray is alive.
+    Arrays which aren't C-contiguous, not in native byte order,
+    read-only, or of 64-bit integers (converted to doubles) are copied,
+    arrays of other than numeric and boolean dtypes become JS arrays.\n
+    Small containers are built directly with bulk property setters,
+    large ones holding plain data only are serialized with `json.dumps`
+    and parsed with a single `JSON.parse` call.\n
+    The result is pinned in the enclosing `JSRuntime.handle_scope`,
+    without one it isn't pinned, like values of other `create_*` helpers.\n
+    `parse_threshold` - min size of arrays and objects built through JSON,
+    `math.inf` disables it (default: module's `parse_threshold`)
+    """
+    with HandleScope() as scope:
+        result = Builder(scope, parse_threshold).build(value)
+        if handle_scopes[0] is not scope:
+            scope.escape(result)
+    return result
+
+
+def to_numpy(value: Any) -> Any:
+    """
+    Returns NumPy array over elements of TypedArray, or bytes
+    of ArrayBuffer or DataView without copying.
+    The array keeps the JS value alive, it is valid until the buffer
+    is detached or the runtime exits
+    """
+    if numpy is None:
+        raise ImportError("to_numpy requires NumPy")
+    ref = walk_asparam_chain(value)
+    kind = typeof(ref)
+    if kind == JSType.typedarray:
+        wrapper = TypedArray
+    elif kind == JSType.arraybuffer:
+        wrapper = ArrayBuffer
+    elif kind == JSType.dataview:
+        wrapper = DataView
+    else:
+        raise TypeError("Expected TypedArray, ArrayBuffer or DataView, "
+                        f"got {JSType(kind).name}")
+    if not isinstance(value, wrapper):
+        value = wrapper(ref)
+    # Element type comes from the view's format
+    return numpy.asarray(value.as_memoryview())
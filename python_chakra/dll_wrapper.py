@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import re
 from abc import abstractmethod
+from array import array
+from collections import OrderedDict
 from ctypes import *
 from enum import IntEnum, unique
-from typing import Any, Dict, Generator, Iterable, List, Literal, Optional, \
-    Protocol, Tuple, Union, runtime_checkable
+from itertools import count
+from typing import Any, Callable, Dict, Generator, Iterable, List, Literal, \
+    Optional, Protocol, Tuple, Union, runtime_checkable
 
-from .utils import FIFOQueue, chakra_core
+from .utils import FIFOQueue, backend, chakra_core, cookies
 
 
 def walk_asparam_chain(value: Any) -> JSValueRef:
@@ -32,6 +35,13 @@ lazy_function_queue = _LazyInitQueue()
 lazy_object_queue = _LazyInitQueue()
 
 
+class BadSerializedScriptError(ValueError):
+    """
+    Raised by `run_serialized` when the engine rejects the bytecode,
+    e.g. it was produced by another build of ChakraCore or is corrupt
+    """
+
+
 class ErrorCodesEnum(IntEnum):
     OK = 0
     ErrorCategoryUsage = 0x10000
@@ -52,110 +62,66 @@ class ErrorCodesEnum(IntEnum):
 
 class Fridge:
     """
-    A frozen container for global objects
+    A frozen container for global objects.
+    Paths like `Fridge["Promise"]["prototype"]["then"]()` are resolved
+    starting from globalThis on their first use and memoized
+    until the runtime exits
     """
-    class __Dict__(dict):
-        def __missing__(self, *_):
-            raise ValueError
-
-    class __ObjectEntry__:
-        value: JSValueRef
-        descendants: Dict[str, Fridge.__ObjectEntry__]
-        __slots__ = "value", "descendants"
-
-        def __init__(self, value, descendants) -> None:
-            self.value = value
-            self.descendants = descendants
-
     class __Lazy__(SupportsLazyInit):
-        __store__: List[str]
+        __path__: Tuple[str, ...]
         __pointer__: JSValueRef
-        __slots__ = "__store__", "__pointer__"
-
-        def __init__(self) -> None:
-            self.__store__ = []
-
-        def __getitem__(self, name) -> None:
-            self.__store__.append(name)
+        __slots__ = "__path__", "__pointer__"
 
-        def __call__(self) -> Any:
-            p = self.__pointer__ = JSValueRef()
-            return p
+        def __init__(self, path: Tuple[str, ...]) -> None:
+            self.__path__ = path
+            self.__pointer__ = JSValueRef()
 
         def __lazy_init__(self) -> None:
-            for propname in self.__store__:
-                Fridge[propname]
-            if hasattr(self, "__pointer__"):
-                self.__pointer__.value = Fridge().value
-            else:
-                raise UserWarning("When initializing value of built-in JS \
-value, __pointer__ property was undefined. Did you forget to call Fridge \
-class?")
+            self.__pointer__.value = Fridge.resolve(self.__path__).value
             return self
 
-    __this: __ObjectEntry__
-    __current: __ObjectEntry__
+    __path: Tuple[str, ...] = ()
     __initialized: bool = False
     __lazily_inited: List[__Lazy__] = []
-    __current_lazy = __Lazy__()
+    __resolved: Dict[Tuple[str, ...], JSValueRef] = {}
 
     def __class_getitem__(cls, name):
-        if cls.__initialized:
-            cls.__current = cls.__current.descendants[name]
-        else:
-            cls.__current_lazy[name]
+        cls.__path += (name,)
         return cls
 
     def __new__(cls) -> JSValueRef:
+        path = cls.__path
+        cls.__path = ()
         if cls.__initialized:
-            current = cls.__current.value
-            cls.__current = cls.__this
-        else:
-            cls.__lazily_inited.append(cls.__current_lazy)
-            current = cls.__current_lazy()
-            cls.__current_lazy = Fridge.__Lazy__()
-        return current
+            return cls.resolve(path)
+        lazy = Fridge.__Lazy__(path)
+        cls.__lazily_inited.append(lazy)
+        return lazy.__pointer__
+
+    @classmethod
+    def resolve(cls, path: Tuple[str, ...]) -> JSValueRef:
+        if not path:
+            return js_globalThis
+        resolved = cls.__resolved
+        value = resolved.get(path)
+        if value is None:
+            value = get_property(cls.resolve(path[:-1]), path[-1])
+            if typeof(value) not in (JSType.object, JSType.function):
+                raise ValueError(f"{'.'.join(path)} is not an object")
+            resolved[path] = value
+        return value
 
     @classmethod
     def __lazy_init__(cls):
-        cls.scan()
+        cls.__resolved.clear()
         cls.__initialized = True
         for _lazily_inited in cls.__lazily_inited:
             _lazily_inited.__lazy_init__()
 
     @classmethod
-    def scan(cls):
-        d = dict()
-
-        def _rec(obj: JSValueRef):
-            def add(value):
-                if typeof(value) not in (JSType.object,
-                                         JSType.function):
-                    return
-                if value.value in d:
-                    entry = d.get(value.value)
-                else:
-                    _dict = Fridge.__Dict__()
-                    entry = Fridge.__ObjectEntry__(value, _dict)
-                    d[value.value] = entry
-                    _dict.update(_rec(value).descendants)
-                dict[name] = entry
-            dict = Fridge.__Dict__()
-            res = Fridge.__ObjectEntry__(obj, dict)
-            d[obj.value] = res
-            names = get_own_property_names(obj)
-            length = to_double(get_property(names, "length"))
-            for i in range(int(length)):
-                name = get_property(names, i)
-                name = js_value_to_string(name)
-                try:
-                    value: JSValueRef = get_property(obj, name)
-                    add(value)
-                except AssertionError:
-                    get_exception()
-            return res
-
-        cls.__this = cls.__current = _rec(js_globalThis)
+    def invalidate(cls):
+        cls.__initialized = False
+        cls.__resolved.clear()
 
 
 class PromiseFIFOQueue(FIFOQueue):
@@ -192,6 +158,57 @@ class JSType(IntEnum):
     dataview = 12
 
 
+@unique
+class JSTypedArrayType(IntEnum):
+    Int8 = 0
+    Uint8 = 1
+    Uint8Clamped = 2
+    Int16 = 3
+    Uint16 = 4
+    Int32 = 5
+    Uint32 = 6
+    Float32 = 7
+    Float64 = 8
+
+
+# Element formats of the buffer protocol (`struct` syntax)
+# by TypedArray type and the other way round, keyed by format and size
+# as sizes of C types differ between platforms
+typed_array_formats: Dict[int, str] = {
+    JSTypedArrayType.Int8: "b",
+    JSTypedArrayType.Uint8: "B",
+    JSTypedArrayType.Uint8Clamped: "B",
+    JSTypedArrayType.Int16: "h",
+    JSTypedArrayType.Uint16: "H",
+    JSTypedArrayType.Int32: "i",
+    JSTypedArrayType.Uint32: "I",
+    JSTypedArrayType.Float32: "f",
+    JSTypedArrayType.Float64: "d",
+}
+_TYPED_ARRAY_KINDS: Dict[Tuple[str, int], JSTypedArrayType] = {
+    ("b", 1): JSTypedArrayType.Int8,
+    ("B", 1): JSTypedArrayType.Uint8,
+    ("c", 1): JSTypedArrayType.Uint8,
+    ("h", 2): JSTypedArrayType.Int16,
+    ("H", 2): JSTypedArrayType.Uint16,
+    ("i", 4): JSTypedArrayType.Int32,
+    ("I", 4): JSTypedArrayType.Uint32,
+    ("l", 4): JSTypedArrayType.Int32,
+    ("L", 4): JSTypedArrayType.Uint32,
+    ("f", 4): JSTypedArrayType.Float32,
+    ("d", 8): JSTypedArrayType.Float64,
+}
+
+
+def typed_array_kind(format: str, itemsize: int) -> Optional[JSTypedArrayType]:
+    """
+    Returns TypedArray type with the same layout as buffer elements
+    of `format` and `itemsize`, `None` if there is no such type
+    (64-bit integers, big-endian or compound formats)
+    """
+    return _TYPED_ARRAY_KINDS.get((format.lstrip("@=<"), itemsize))
+
+
 @unique
 class JSPromiseStates(IntEnum):
     Pending = 0
@@ -199,7 +216,157 @@ class JSPromiseStates(IntEnum):
     Rejected = 2
 
 
+class ScratchBuffer:
+    """
+    Growable UTF-16 buffer reused by `js_value_to_string`.
+    Gets released by `JSRuntime.__exit__`
+    """
+    __slots__ = "buffer", "size"
+    buffer: Optional[Array[c_uint16]]
+    size: int
+
+    def __init__(self) -> None:
+        self.release()
+
+    def get(self, size: int) -> Array[c_uint16]:
+        if size > self.size or self.buffer is None:
+            self.size = max(size, self.size * 2, 256)
+            self.buffer = (c_uint16 * self.size)()
+        return self.buffer
+
+    def release(self) -> None:
+        self.buffer = None
+        self.size = 0
+
+
+class JSStringCache:
+    """
+    Opt-in LRU of pinned JS strings keyed by the python string.
+    Caching is disabled while `capacity` is 0.
+    Handles returned from the cache are shared and must not be released
+    """
+    __slots__ = "capacity", "hits", "misses", "__entries"
+    capacity: int
+    hits: int
+    misses: int
+    __entries: OrderedDict[str, JSValueRef]
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def get(self, string: str) -> JSValueRef:
+        if not self.capacity or type(string) is not str:
+            return str_to_js_string(string)
+        entries = self.__entries
+        handle = entries.get(string)
+        if handle is not None:
+            entries.move_to_end(string)
+            self.hits += 1
+            return handle
+        self.misses += 1
+        handle = entries[string] = str_to_js_string(string)
+        add_ref(handle)
+        while len(entries) > self.capacity:
+            js_release(entries.popitem(last=False)[1])
+        return handle
+
+    def clear(self) -> None:
+        """
+        Releases all cached strings, must be called
+        before the runtime is disposed
+        """
+        entries = self.__entries
+        while entries:
+            js_release(entries.popitem()[1])
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __repr__(self) -> str:
+        return f"JSStringCache(capacity={self.capacity}, " \
+            f"size={len(self)}, hits={self.hits}, misses={self.misses})"
+
+
+class HandleScope:
+    """
+    While the scope is active, handles returned by `call`, `construct`,
+    `get_property` and `to_number` are pinned and their addresses recorded,
+    on exit all of them are released in one sweep.
+    See `JSRuntime.handle_scope`
+    """
+    __slots__ = "handles",
+    handles: array
+
+    def __init__(self) -> None:
+        # Addresses only, no object per handle
+        self.handles = array("Q")
+
+    def add(self, value: JSValueRef) -> JSValueRef:
+        address = value.value
+        if address:
+            chakra_core.JsAddRef(address, None)
+            self.handles.append(address)
+        return value
+
+    def escape(self, value: Any) -> Any:
+        """
+        Keeps `value` alive after this scope exits by pinning it in the outer
+        scope. Without an outer scope the value stays pinned until it is
+        released with `js_release`
+        """
+        if self not in handle_scopes:
+            raise RuntimeError("Can't escape a value from a handle scope "
+                               "which isn't active")
+        ref = walk_asparam_chain(value)
+        index = handle_scopes.index(self)
+        if index > 0:
+            handle_scopes[index - 1].add(ref)
+        else:
+            add_ref(ref)
+        return value
+
+    def release(self) -> None:
+        release = chakra_core.JsRelease
+        for address in self.handles:
+            release(address, None)
+        del self.handles[:]
+
+    def abandon(self) -> None:
+        """
+        Forgets the handles without releasing them,
+        used when the runtime is disposed while the scope is active
+        """
+        del self.handles[:]
+
+    def __enter__(self) -> HandleScope:
+        handle_scopes.append(self)
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        if self in handle_scopes:
+            handle_scopes.remove(self)
+        self.release()
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+
 promise_queue = PromiseFIFOQueue()
+_serialized_sources: Dict[int, Tuple[JSValueRef, int]] = {}
+# Contexts of serialized scripts whose bytecode was collected,
+# their sources are released outside of the GC
+_collected_sources: List[int] = []
+js_string_cache = JSStringCache()
+string_scratch = ScratchBuffer()
+# Active handle scopes, the innermost one is the last
+handle_scopes: List[HandleScope] = []
+# Python buffers shared with the engine as external ArrayBuffers
+# by token passed to their finalizer
+external_buffers: Dict[int, Any] = {}
+_external_tokens = count(1)
 nullptr = POINTER(c_int)()
 StrictModeType = Union[bool, Literal[0, 1]]
 JSValueRef = c_void_p
@@ -229,10 +396,197 @@ js_array: JSValueRef = JSValueRef()
 js_atomics: JSValueRef = JSValueRef()
 js_bigint: JSValueRef = JSValueRef()
 js_eval_function: JSValueRef = JSValueRef()
+js_json_parse: JSValueRef = JSValueRef()
 js_error: JSValueRef = JSValueRef()
 js_error_prototype: JSValueRef = JSValueRef()
 js_then: JSValueRef = JSValueRef()
 js_reflect: JSValueRef = JSValueRef()
+js_set_properties: JSValueRef = JSValueRef()
+js_get_properties: JSValueRef = JSValueRef()
+js_get_indexed_range: JSValueRef = JSValueRef()
+js_on_settled: JSValueRef = JSValueRef()
+js_plain_array: JSValueRef = JSValueRef()
+js_plain_object: JSValueRef = JSValueRef()
+_bulk_results: List[List[JSValueRef]] = []
+# JsCallFunction and native callbacks take an unsigned short argument count
+_BULK_CHUNK = 0x4000
+_BULK_MIN = 3
+_BULK_HELPERS = """(function (sink) {
+    "use strict";
+    var apply = Reflect.apply, stringify = JSON.stringify, keys = Object.keys,
+        getPrototypeOf = Object.getPrototypeOf, finite = Number.isFinite,
+        objectPrototype = Object.prototype, arrayPrototype = Array.prototype;
+    // Rejects everything JSON would silently change or drop
+    function plain(key, value) {
+        // `value` is already the result of `toJSON` (e.g. of a Date),
+        // the holder still has the original
+        var raw = this[key];
+        if (raw !== null && (typeof raw === "object" ||
+                typeof raw === "function") && typeof raw.toJSON === "function")
+            throw plain;
+        switch (typeof value) {
+            case "string":
+            case "boolean":
+                return value;
+            case "number":
+                if (finite(value))
+                    return value;
+                break;
+            case "object":
+                if (value === null)
+                    return value;
+                var prototype = getPrototypeOf(value);
+                if (prototype === objectPrototype ||
+                        prototype === arrayPrototype || prototype === null)
+                    return value;
+        }
+        throw plain;
+    }
+    function toJSON(value) {
+        try {
+            return stringify(value, plain);
+        } catch (e) {
+            return undefined;
+        }
+    }
+    return [
+        function (object, keys) {
+            keys = keys.split("\\0");
+            for (var i = 0; i < keys.length; i++)
+                object[keys[i]] = arguments[i + 2];
+            return object;
+        },
+        function (object, keys) {
+            keys = keys.split("\\0");
+            var values = new Array(keys.length);
+            for (var i = 0; i < keys.length; i++)
+                values[i] = object[keys[i]];
+            return apply(sink, undefined, values);
+        },
+        function (array, start, stop) {
+            var values = new Array(stop - start);
+            for (var i = start; i < stop; i++)
+                values[i - start] = array[i];
+            return apply(sink, undefined, values);
+        },
+        function (array, threshold) {
+            var length = array.length;
+            if (length >= threshold) {
+                var json = toJSON(array);
+                if (json !== undefined)
+                    return json;
+            }
+            if (length >= 0x4000)
+                return length;
+            return apply(sink, undefined, array);
+        },
+        function (object, threshold) {
+            var names = keys(object), length = names.length;
+            if (length >= threshold) {
+                var json = toJSON(object);
+                if (json !== undefined)
+                    return json;
+            }
+            if (length >= 0x4000)
+                return names;
+            var values = new Array(length + 1);
+            for (var i = 0; i < length; i++) {
+                if (names[i].indexOf("\0") !== -1)
+                    return names;
+                values[i + 1] = object[names[i]];
+            }
+            values[0] = names.join("\0");
+            return apply(sink, undefined, values);
+        }
+    ];
+})"""
+
+
+@CFUNCTYPE(c_void_p, JSValueRef, c_bool, POINTER(JSValueRef), c_ushort,
+           c_void_p)
+def _bulk_sink(callee, new_call, args, argc, _):
+    """
+    Receives a whole batch of values as arguments of a single call
+    """
+    _bulk_results.append([JSValueRef(args[i]) for i in range(1, argc)])
+    return js_undefined.value
+
+
+_SETTLE_HELPER = """(function (dispatch) {
+    "use strict";
+    var P = Promise, resolve = P.resolve, then = P.prototype.then;
+    return function (value, slot) {
+        then.call(resolve.call(P, value),
+                  function (value) { dispatch(slot, true, value); },
+                  function (reason) { dispatch(slot, false, reason); });
+    };
+})"""
+
+
+class CallbackSlots:
+    """
+    Python callbacks addressed by small integer ids.
+    Ids of released callbacks are reused, so the table is only as large
+    as the number of callbacks pending at once
+    """
+    __slots__ = "callbacks", "free"
+    callbacks: List[Optional[Callable[[bool, JSValueRef], Any]]]
+    free: List[int]
+
+    def __init__(self) -> None:
+        self.callbacks = []
+        self.free = []
+
+    def add(self, callback: Callable[[bool, JSValueRef], Any]) -> int:
+        if self.free:
+            slot = self.free.pop()
+            self.callbacks[slot] = callback
+        else:
+            slot = len(self.callbacks)
+            self.callbacks.append(callback)
+        return slot
+
+    def pop(self, slot: int) -> Callable[[bool, JSValueRef], Any]:
+        callback = self.callbacks[slot]
+        self.callbacks[slot] = None
+        self.free.append(slot)
+        return callback
+
+    def clear(self) -> None:
+        self.callbacks.clear()
+        self.free.clear()
+
+    def __len__(self) -> int:
+        return len(self.callbacks) - len(self.free)
+
+
+settle_callbacks = CallbackSlots()
+
+
+@CFUNCTYPE(c_void_p, JSValueRef, c_bool, POINTER(JSValueRef), c_ushort,
+           c_void_p)
+def _settle_dispatch(callee, new_call, args, argc, _):
+    """
+    The only native function behind every `on_settled` callback
+    """
+    # Elements of `args` are plain addresses
+    callback = settle_callbacks.pop(to_int(JSValueRef(args[1])))
+    try:
+        callback(args[2] == js_true.value, JSValueRef(args[3]))
+    except Exception as ex:
+        print("An error happened when executed",
+              "promise settlement callback:", ex, sep="\n")
+    return js_undefined.value
+
+
+def on_settled(value: JSValueRef,
+               callback: Callable[[bool, JSValueRef], Any]) -> None:
+    """
+    Calls `callback(fulfilled, result)` once `value` (a promise or any
+    other value) is settled. `result` is only valid during the call
+    """
+    slot = settle_callbacks.add(callback)
+    call(js_on_settled, value, to_number(slot))
 
 
 def init_utilitites():
@@ -250,21 +604,55 @@ def init_other_utilities():
     pointer(js_atomics)[0] = get_property(js_globalThis, "Atomics")
     pointer(js_bigint)[0] = get_property(js_globalThis, "BigInt")
     pointer(js_eval_function)[0] = get_property(js_globalThis, "eval")
+    pointer(js_json_parse)[0] = get_property(
+        get_property(js_globalThis, "JSON"), "parse")
+    # Survives user code replacing or deleting `JSON.parse`
+    add_ref(js_json_parse)
+    init_bulk_helpers()
+    init_settle_helper()
     lazy_function_queue.exec()
     lazy_object_queue.exec()
 
 
+def init_bulk_helpers():
+    factory = call(js_eval_function, str_to_js_string(_BULK_HELPERS))
+    helpers = call(factory, create_function(_bulk_sink, "sink"))
+    for index, helper in enumerate((js_set_properties, js_get_properties,
+                                    js_get_indexed_range, js_plain_array,
+                                    js_plain_object)):
+        pointer(helper)[0] = get_property(helpers, index)
+        add_ref(helper)
+
+
+def init_settle_helper():
+    factory = call(js_eval_function, str_to_js_string(_SETTLE_HELPER))
+    pointer(js_on_settled)[0] = call(
+        factory, create_function(_settle_dispatch, "dispatch"))
+    add_ref(js_on_settled)
+    settle_callbacks.clear()
+
+
 def str_to_js_string(string: str) -> JSValueRef:
     """
     Converts python string to js string value ref
     """
-    string = str(string)  # Making sure
+    # UTF-16 is what the engine stores, so it doesn't have to transcode
+    data = str(string).encode("utf-16-le", "surrogatepass")
     string_pointer = JSValueRef()
-    chakra_core.JsCreateString(create_string_buffer(string.encode("utf8")),
-                               len(string), byref(string_pointer))
+    c = chakra_core.JsCreateStringUtf16(data, len(data) // 2,
+                                        byref(string_pointer))
+    assert c == 0, descriptive_message(c, "str_to_js_string")
     return string_pointer
 
 
+def intern_js_string(string: str) -> JSValueRef:
+    """
+    Same as `str_to_js_string`, but goes through `js_string_cache`.
+    The result is shared and must not be released
+    """
+    return js_string_cache.get(string)
+
+
 def str_to_array(string: Union[str, int], *, encoding="utf8") -> Array[c_char]:
     string = str(string).encode(encoding)
     return create_string_buffer(string)
@@ -288,7 +676,6 @@ def to_array(arr: List[JSValueRef]):
     array = create_array(len(arr))
     for index, item in enumerate(arr):
         set_property(array, index, item)
-    print(js_value_to_string(array))
     return array
 
 
@@ -296,27 +683,160 @@ def create_object(props: Optional[PropertyDict] = None) -> JSValueRef:
     obj = JSValueRef()
     c = chakra_core.JsCreateObject(byref(obj))
     assert c == 0, descriptive_message(c, "create_object")
-    if props is not None:
-        for prop, item in props.items():
+    if props:
+        set_properties(obj, props)
+    return obj
+
+
+def _join_keys(keys: Iterable[Union[str, int]]) -> Optional[str]:
+    keys = [str(key) for key in keys]
+    if any("\0" in key for key in keys):
+        return None
+    return "\0".join(keys)
+
+
+def set_properties(obj: JSValueRef, props: PropertyDict) -> JSValueRef:
+    """
+    Sets all properties from `props` on `obj`
+    with one native call per batch of keys
+    """
+    items = list(props.items())
+    if len(items) < _BULK_MIN:
+        for prop, item in items:
             set_property(obj, prop, item)
+        return obj
+    for start in range(0, len(items), _BULK_CHUNK):
+        chunk = items[start:start + _BULK_CHUNK]
+        keys = _join_keys(key for key, _ in chunk)
+        if keys is None:
+            for prop, item in chunk:
+                set_property(obj, prop, item)
+        else:
+            call(js_set_properties, obj, intern_js_string(keys),
+                 *(item for _, item in chunk))
     return obj
 
 
-def get_property_id_from_str(string: str) -> JSValueRef:
-    prop_id = JSValueRef()
-    c = chakra_core.JsCreatePropertyId(str_to_array(string),
-                                       len(string), byref(prop_id))
+def get_properties(obj: JSValueRef,
+                   names: Iterable[Union[str, int]]) -> List[JSValueRef]:
+    """
+    Reads properties `names` of `obj` with one native call per batch of keys
+    """
+    names = list(names)
+    if len(names) < _BULK_MIN:
+        return [get_property(obj, name) for name in names]
+    values = []
+    for start in range(0, len(names), _BULK_CHUNK):
+        chunk = names[start:start + _BULK_CHUNK]
+        keys = _join_keys(chunk)
+        if keys is None:
+            values.extend(get_property(obj, name) for name in chunk)
+        else:
+            call(js_get_properties, obj, intern_js_string(keys))
+            values.extend(_bulk_results.pop())
+    return values
+
+
+def get_indexed_range(array: JSValueRef, start: int = 0,
+                      stop: Optional[int] = None) -> List[JSValueRef]:
+    """
+    Reads `array[start:stop]` with one native call per batch of indexes
+    """
+    if stop is None:
+        stop = to_int(get_property(array, "length"))
+    values = []
+    for chunk_start in range(start, stop, _BULK_CHUNK):
+        chunk_stop = min(chunk_start + _BULK_CHUNK, stop)
+        call(js_get_indexed_range, array, to_number(chunk_start),
+             to_number(chunk_stop))
+        values.extend(_bulk_results.pop())
+    return values
+
+
+def get_property_id_from_str(string: str) -> JSRef:
+    """
+    Creates a new property id, bypassing the `property_ids` cache
+    """
+    name = str(string).encode("utf8")
+    prop_id = JSRef()
+    c = chakra_core.JsCreatePropertyId(name, len(name), byref(prop_id))
     assert c == 0, descriptive_message(c, "get_property_id_from_str")
     return prop_id
 
 
+class PropertyIdCache(dict):
+    """
+    Interned property ids of the current runtime.
+    Gets invalidated by `JSRuntime.__exit__`
+    """
+    generation: int
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.generation = 0
+
+    def __missing__(self, name: str) -> JSRef:
+        prop_id = self[name] = get_property_id_from_str(name)
+        # Pin the property id so it won't be collected
+        # while it sits in the cache
+        add_ref(prop_id)
+        return prop_id
+
+    def clear(self) -> None:
+        # The ids are owned by the runtime, they go away with it
+        super().clear()
+        self.generation += 1
+
+
+property_ids = PropertyIdCache()
+
+
+class PropertyAccessor:
+    """
+    Holds a pre-resolved property id of a frequently accessed property.
+    Can be passed as a key to `get_property` and `set_property`
+    """
+    __slots__ = "name", "__id", "__generation"
+    name: str
+
+    def __init__(self, name: str) -> None:
+        self.name = str(name)
+        self.__id = None
+        self.__generation = -1
+
+    @property
+    def _as_parameter_(self) -> JSRef:
+        if self.__generation != property_ids.generation:
+            self.__id = property_ids[self.name]
+            self.__generation = property_ids.generation
+        return self.__id
+
+    def get(self, obj: JSValueRef) -> JSValueRef:
+        r = JSValueRef()
+        c = chakra_core.JsGetProperty(obj, self._as_parameter_, byref(r))
+        assert c == 0, descriptive_message(c, "PropertyAccessor.get")
+        return r
+
+    def set(self, obj: JSValueRef, value: JSValueRef, *,
+            strict_mode: StrictModeType = c_true) -> JSValueRef:
+        c = chakra_core.JsSetProperty(obj, self._as_parameter_, value,
+                                      strict_mode)
+        assert c == 0, descriptive_message(c, "PropertyAccessor.set")
+        return obj
+
+    def __repr__(self) -> str:
+        return f"PropertyAccessor({self.name!r})"
+
+
 def set_property(obj: JSValueRef,
-                 key: Union[str, int],
+                 key: Union[str, int, PropertyAccessor],
                  value: JSValueRef, *,
                  strict_mode: StrictModeType = c_true) -> JSValueRef:
     if type(key) is str:
-        prop_id = get_property_id_from_str(key)
-        c = chakra_core.JsSetProperty(obj, prop_id, value, strict_mode)
+        c = chakra_core.JsSetProperty(obj, property_ids[key], value,
+                                      strict_mode)
+    elif type(key) is PropertyAccessor:
+        c = chakra_core.JsSetProperty(obj, key, value, strict_mode)
     else:
         key = to_number(key)
         c = chakra_core.JsSetIndexedProperty(obj, key, value)
@@ -337,7 +857,7 @@ def create_function(callback: c_func_type,
     if name is None:
         c = chakra_core.JsCreateFunction(callback, 0, p)
     else:
-        name_ = str_to_js_string(name)
+        name_ = intern_js_string(name)
         c = chakra_core.JsCreateNamedFunction(name_, callback, 0, p)
     assert c == 0, descriptive_message(c, "create_function")
     return function
@@ -345,14 +865,15 @@ def create_function(callback: c_func_type,
 
 def create_error(message: str) -> JSValueRef:
     error = JSValueRef()
-    c = chakra_core.JsCreateError(str_to_js_string(message), byref(error))
+    c = chakra_core.JsCreateError(intern_js_string(message), byref(error))
     assert c == 0, descriptive_message(c, "create_error")
     return error
 
 
 def create_type_error(message: str) -> JSValueRef:
     error = JSValueRef()
-    c = chakra_core.JsCreateTypeError(str_to_js_string(message), byref(error))
+    c = chakra_core.JsCreateTypeError(intern_js_string(message),
+                                      byref(error))
     assert c == 0, descriptive_message(c, "create_type_error")
     return error
 
@@ -364,6 +885,8 @@ def call(f: JSValueRef, *args, this: JSValueRef = js_undefined) -> JSValueRef:
     result = JSValueRef()
     c = chakra_core.JsCallFunction(f, a, _l, byref(result))
     assert c == 0, descriptive_message(c, "call")
+    if handle_scopes:
+        handle_scopes[-1].add(result)
     return result
 
 
@@ -375,6 +898,8 @@ def construct(f: JSValueRef, *args,
     result = JSValueRef()
     c = chakra_core.JsConstructObject(f, a, _l, byref(result))
     assert c == 0, descriptive_message(c, "construct")
+    if handle_scopes:
+        handle_scopes[-1].add(result)
     return result
 
 
@@ -399,23 +924,24 @@ def get_prototype(value: JSValueRef) -> JSValueRef:
     return proto
 
 
-def get_property(object: JSValueRef, prop: Union[str, int]) -> JSValueRef:
+def get_property(object: JSValueRef,
+                 prop: Union[str, int, PropertyAccessor]) -> JSValueRef:
     r = JSValueRef()
     if type(prop) is int:
-        c = chakra_core.JsGetIndexedProperty(object, to_number(prop),
+        c = chakra_core.JsGetIndexedProperty(object, _to_number(prop),
                                              byref(r))
     else:
-        c = chakra_core.JsGetProperty(object, get_property_id_from_str(prop),
-                                      byref(r))
+        if type(prop) is not PropertyAccessor:
+            prop = property_ids[prop]
+        c = chakra_core.JsGetProperty(object, prop, byref(r))
     assert c == 0, descriptive_message(c, "get_property")
+    if handle_scopes:
+        handle_scopes[-1].add(r)
     return r
 
 
 def array_to_iterable(array: JSValueRef) -> Iterable[JSValueRef]:
-    length = to_int(get_property(array, "length"))
-    return (get_property(array, index) for index in range(0, length))
-    # for index in range(0, length):
-    #     yield get_property(array, index)
+    return iter(get_indexed_range(array))
 
 
 def array_to_list(array: JSValueRef) -> List[JSValueRef]:
@@ -433,25 +959,37 @@ def to_object(value: JSValueRef) -> JSValueRef:
     return object
 
 
-def to_number(value: _NumberLike) -> JSValueRef:
+def _to_number(value: _NumberLike) -> JSValueRef:
     number = JSValueRef()
     if type(value) is POINTER(JSValueRef) or type(value) is JSValueRef:
         c = chakra_core.JsConvertValueToNumber(value, byref(number))
     else:
-        c = chakra_core.JsDoubleToNumber(c_longdouble(value), byref(number))
+        c = chakra_core.JsDoubleToNumber(float(value), byref(number))
     assert c == 0, descriptive_message(c, "to_number")
     return number
 
 
+def to_number(value: _NumberLike) -> JSValueRef:
+    number = _to_number(value)
+    if handle_scopes:
+        handle_scopes[-1].add(number)
+    return number
+
+
 def to_double(value: _NumberLike) -> float:
-    number = c_longdouble()
-    c = chakra_core.JsNumberToDouble(to_number(value), byref(number))
+    if type(value) is float or type(value) is int:
+        return float(value)
+    number = c_double()
+    # Numbers are read directly, other values are converted first
+    c = chakra_core.JsNumberToDouble(value, byref(number))
+    if c != 0:
+        c = chakra_core.JsNumberToDouble(_to_number(value), byref(number))
     assert c == 0, descriptive_message(c, "to_double")
     return number.value
 
 
 def to_int(value: JSValueRef) -> int:
-    value = to_number(value)
+    value = _to_number(value)
     number = c_int(0)
     c = chakra_core.JsNumberToInt(value, byref(number))
     assert c == 0, descriptive_message(c, "to_int")
@@ -507,6 +1045,17 @@ def inspect(value: JSValueRef, indent="\t") -> str:
     return js_value_to_string(value)
 
 
+def set_before_collect_callback(ref: JSValueRef, callback,
+                                state: Optional[int] = None) -> None:
+    """
+    `callback` is a `CFUNCTYPE(None, c_void_p, c_void_p)` called with
+    the object's address and `state` right before the engine collects it,
+    the caller keeps it alive
+    """
+    c = chakra_core.JsSetObjectBeforeCollectCallback(ref, state, callback)
+    assert c == 0, descriptive_message(c, "set_before_collect_callback")
+
+
 def set_promise_callback(callback):
     __callback_refs.append(callback)
     c = chakra_core.JsSetPromiseContinuationCallback(callback, 0)
@@ -520,7 +1069,7 @@ def set_rejections_callback(callback):
 
 
 def set_current_context(context):
-    c = chakra_core.JsSetCurrentContext(context, 0)
+    c = chakra_core.JsSetCurrentContext(context)
     assert c == 0, descriptive_message(c, "set_current_context")
 
 
@@ -624,11 +1173,247 @@ def init_module_record(ref_module: JSModuleRecord,
 
 
 def create_external_array_buffer(script) -> JSRef:
-    script_source = JSRef()
-    c = chakra_core.JsCreateExternalArrayBuffer(script, len(script), 0,
-                                                0, byref(script_source))
-    assert c == 0, descriptive_message(c, "create_external_array_buffer")
-    return script_source
+    """
+    Creates ArrayBuffer over script source or bytecode `script`.
+    The engine comes back to it (deferred parsing) while any function
+    of the script is alive, so `script` is kept until the engine
+    collects the ArrayBuffer, see `wrap_buffer`.
+    Unlike `wrap_buffer`, `bytes` are shared without copying,
+    scripts never see this ArrayBuffer
+    """
+    if type(script) is bytes:
+        return _external_array_buffer(
+            script, cast(c_char_p(script), c_void_p).value, len(script))
+    return wrap_buffer(script)
+
+
+def create_array_buffer(data: Union[int, Any]) -> JSValueRef:
+    """
+    Creates engine-owned ArrayBuffer holding a copy of `data`
+    (any contiguous object supporting the buffer protocol),
+    or `data` zeroed bytes when it is an `int`
+    """
+    view = None if type(data) is int else memoryview(data).cast("B")
+    buffer = JSValueRef()
+    c = chakra_core.JsCreateArrayBuffer(data if view is None else len(view),
+                                        byref(buffer))
+    assert c == 0, descriptive_message(c, "create_array_buffer")
+    if view:
+        if type(data) is bytes:
+            source = data
+        elif view.readonly:
+            source = view.tobytes()
+        else:
+            source = (c_char * len(view)).from_buffer(view)
+        address, _ = get_array_buffer_storage(buffer)
+        memmove(address, source, len(view))
+    return buffer
+
+
+@CFUNCTYPE(None, c_void_p)
+def _release_external_buffer(token):
+    external_buffers.pop(token, None)
+
+
+def wrap_buffer(data: Any) -> JSValueRef:
+    """
+    Creates ArrayBuffer over memory of `data` (any C-contiguous object
+    supporting the buffer protocol) without copying.
+    `data` stays exported (`bytearray` can't be resized, `mmap` can't be
+    closed) until the engine collects the ArrayBuffer or the runtime exits.
+    Read-only buffers (`bytes` included) are copied,
+    so scripts can't change them in place
+    """
+    view = memoryview(data)
+    if not view.c_contiguous:
+        raise BufferError("Buffer is not C-contiguous")
+    view = view.cast("B")
+    if view.readonly:
+        view = memoryview(bytearray(view))
+    storage = (c_char * len(view)).from_buffer(view)
+    return _external_array_buffer(storage, addressof(storage), len(view))
+
+
+def _external_array_buffer(storage: Any, address: int,
+                           length: int) -> JSValueRef:
+    """
+    Creates ArrayBuffer over `length` bytes at `address`,
+    keeping `storage` alive until the engine collects it
+    """
+    token = next(_external_tokens)
+    external_buffers[token] = storage
+    buffer = JSValueRef()
+    c = chakra_core.JsCreateExternalArrayBuffer(address, length,
+                                                _release_external_buffer,
+                                                token, byref(buffer))
+    if c != 0:
+        del external_buffers[token]
+    assert c == 0, descriptive_message(c, "wrap_buffer")
+    return buffer
+
+
+def create_typed_array(kind: int, buffer: JSValueRef, offset: int = 0,
+                       length: int = 0) -> JSValueRef:
+    """
+    Creates TypedArray of `JSTypedArrayType` `kind` over `buffer`
+    starting at byte `offset`, zero `length` spans the rest of the buffer
+    """
+    result = JSValueRef()
+    c = chakra_core.JsCreateTypedArray(kind, buffer, offset, length,
+                                       byref(result))
+    assert c == 0, descriptive_message(c, "create_typed_array")
+    return result
+
+
+def create_data_view(buffer: JSValueRef, offset: int = 0,
+                     length: Optional[int] = None) -> JSValueRef:
+    """
+    Creates DataView over `length` bytes of `buffer` starting at `offset`,
+    by default up to the end of the buffer
+    """
+    if length is None:
+        length = get_array_buffer_storage(buffer)[1] - offset
+    result = JSValueRef()
+    c = chakra_core.JsCreateDataView(buffer, offset, length, byref(result))
+    assert c == 0, descriptive_message(c, "create_data_view")
+    return result
+
+
+def buffer_view(data: Union[bytes, bytearray, Any]) -> Any:
+    """
+    Returns `data` in a form ctypes passes as a pointer without copying.
+    `bytes` are passed as is, writable buffers (`bytearray`, `mmap`
+    opened with `ACCESS_COPY`) are wrapped in a `c_char` array,
+    which keeps the buffer alive
+    """
+    if type(data) is bytes:
+        return data
+    return (c_char * len(data)).from_buffer(data)
+
+
+def get_array_buffer_storage(buffer: JSValueRef) -> Tuple[int, int]:
+    """
+    Returns address and length of ArrayBuffer's storage
+    """
+    address = c_void_p()
+    length = c_uint()
+    c = chakra_core.JsGetArrayBufferStorage(buffer, byref(address),
+                                            byref(length))
+    assert c == 0, descriptive_message(c, "get_array_buffer_storage")
+    return address.value or 0, length.value
+
+
+def get_typed_array_storage(array: JSValueRef) -> Tuple[int, int, int, int]:
+    """
+    Returns address and length in bytes of TypedArray's elements,
+    their `JSTypedArrayType` and size
+    """
+    address = c_void_p()
+    length = c_uint()
+    kind = c_int()
+    size = c_int()
+    c = chakra_core.JsGetTypedArrayStorage(array, byref(address),
+                                           byref(length), byref(kind),
+                                           byref(size))
+    assert c == 0, descriptive_message(c, "get_typed_array_storage")
+    return address.value or 0, length.value, kind.value, size.value
+
+
+def get_typed_array_info(array: JSValueRef) -> \
+        Tuple[int, JSValueRef, int, int]:
+    """
+    Returns `JSTypedArrayType` of TypedArray, its ArrayBuffer,
+    offset and length in bytes within the buffer
+    """
+    kind = c_int()
+    buffer = JSValueRef()
+    offset = c_uint()
+    length = c_uint()
+    c = chakra_core.JsGetTypedArrayInfo(array, byref(kind), byref(buffer),
+                                        byref(offset), byref(length))
+    assert c == 0, descriptive_message(c, "get_typed_array_info")
+    return kind.value, buffer, offset.value, length.value
+
+
+def get_data_view_storage(view: JSValueRef) -> Tuple[int, int]:
+    """
+    Returns address and length of DataView's bytes
+    """
+    address = c_void_p()
+    length = c_uint()
+    c = chakra_core.JsGetDataViewStorage(view, byref(address),
+                                         byref(length))
+    assert c == 0, descriptive_message(c, "get_data_view_storage")
+    return address.value or 0, length.value
+
+
+def serialize_script(script: JSValueRef,
+                     attributes: int = 0x22) -> JSValueRef:
+    """
+    Parses the script and returns an ArrayBuffer with its bytecode
+    """
+    buffer = JSValueRef()
+    c = chakra_core.JsSerialize(script, byref(buffer), attributes)
+    assert c == 0, descriptive_message(c, "serialize_script")
+    return buffer
+
+
+@CFUNCTYPE(c_bool, c_size_t, POINTER(JSValueRef), POINTER(c_int))
+def _load_serialized_source(context, value, attributes):
+    if context not in _serialized_sources:
+        return False
+    source, source_attributes = _serialized_sources[context]
+    value[0] = source.value
+    attributes[0] = source_attributes
+    return True
+
+
+def run_serialized(buffer: JSValueRef, source: JSValueRef,
+                   filename: JSValueRef, attributes: int = 0x22) -> JSValueRef:
+    """
+    Runs bytecode produced by `serialize_script`, `source` is handed
+    to the engine whenever it needs the original text of the script
+    """
+    release_collected_sources()
+    context = cookies.increment()
+    add_ref(source)
+    _serialized_sources[context] = source, attributes
+    result = JSValueRef()
+    c = chakra_core.JsRunSerialized(buffer, _load_serialized_source, context,
+                                    filename, byref(result))
+    if c == ErrorCodesEnum.ErrorBadSerializedScript:
+        del _serialized_sources[context]
+        js_release(source)
+        raise BadSerializedScriptError(
+            descriptive_message(c, "run_serialized"))
+    assert c == 0, descriptive_message(c, "run_serialized")
+    # The source is needed as long as functions of the script are alive,
+    # and so is the bytecode
+    set_before_collect_callback(buffer, _collect_serialized_source, context)
+    return result
+
+
+@CFUNCTYPE(None, c_void_p, c_void_p)
+def _collect_serialized_source(_, context):
+    # No engine calls during GC
+    _collected_sources.append(context)
+
+
+def release_collected_sources() -> None:
+    """
+    Releases sources of serialized scripts which can't run anymore
+    """
+    while _collected_sources:
+        entry = _serialized_sources.pop(_collected_sources.pop(), None)
+        if entry is not None:
+            js_release(entry[0])
+
+
+def release_serialized_sources() -> None:
+    for source, _ in _serialized_sources.values():
+        js_release(source)
+    _serialized_sources.clear()
+    _collected_sources.clear()
 
 
 def dispose_runtime(runtime) -> None:
@@ -661,9 +1446,14 @@ def get_runtime_memory_limit(runtime: c_void_p) -> int:
 
 
 def set_runtime_memory_limit(runtime: c_void_p, memory_limit: int) -> int:
-    c = chakra_core.JsSetRuntimeMemoryLimit(runtime, c_size_t(memory_limit))
+    c = chakra_core.JsSetRuntimeMemoryLimit(runtime, memory_limit)
     assert c == 0, descriptive_message(c, "set_runtime_memory_limit")
-    return memory_limit.value
+    return memory_limit
+
+
+def collect_garbage(runtime: c_void_p) -> None:
+    c = chakra_core.JsCollectGarbage(runtime)
+    assert c == 0, descriptive_message(c, "collect_garbage")
 
 
 def get_runtime_memory_usage(runtime: c_void_p) -> int:
@@ -680,15 +1470,31 @@ def run_module(module: c_void_p) -> JSValueRef:
     return result
 
 
-def run_script(script: Any, filename: c_char_p) -> JSValueRef:
+def run_script(script: Any, filename: c_char_p,
+               attributes: int = 0x22) -> JSValueRef:
     result = JSValueRef()
     c = chakra_core.JsRun(script, 0, filename,
-                          0x22, byref(result))
+                          attributes, byref(result))
     assert c == 0, descriptive_message(c, "run_script")
     return result
 
 
-def create_c_string(string: str):
+def parse_script(script: Any, filename: JSValueRef,
+                 attributes: int = 0x22) -> JSValueRef:
+    """
+    Parses the script without running it,
+    returns a function which runs the script when called
+    """
+    result = JSValueRef()
+    c = chakra_core.JsParse(script, cookies.increment(), filename,
+                            attributes, byref(result))
+    assert c == 0, descriptive_message(c, "parse_script")
+    return result
+
+
+def create_c_string(string: Union[str, bytes]):
+    if type(string) is not bytes:
+        string = str(string).encode("utf8")
     result = JSValueRef()
     c = chakra_core.JsCreateString(string, len(string), byref(result))
     assert c == 0, descriptive_message(c, "create_c_string")
@@ -702,35 +1508,33 @@ def c_array_to_iterator(array, length, offset=0) -> \
 
 
 def add_ref(ref: JSValueRef):
-    chakra_core.JsAddRef(ref, 0)
+    chakra_core.JsAddRef(ref, None)
 
 
 def js_release(ref: JSValueRef):
-    chakra_core.JsRelease(ref, 0)
+    chakra_core.JsRelease(ref, None)
 
 
 def js_value_to_string(value: JSValueRef) -> str:
     """
     Converts JavaScript value to python string
     """
-    # Convert script result to String in JavaScript;
-    # redundant if script returns a String
-    result_js_string = JSValueRef()
-    chakra_core.JsConvertValueToString(value, byref(result_js_string))
-
-    string_length = c_size_t()
-    # Get buffer size needed for the result string
-    chakra_core.JsCopyString(result_js_string, 0, 0, byref(string_length))
-
-    # buffer is big enough to store the result
-    result_string = create_string_buffer(string_length.value + 1)
-
-    # Get String from JSValueRef
-    chakra_core.JsCopyString(result_js_string, byref(result_string),
-                             string_length.value + 1, 0)
-
-    # Set `null-ending` to the end
-    result_string_last_byte = (c_char * string_length.value) \
-        .from_address(addressof(result_string))
-    result_string_last_byte = '\0'  # noqa: F841
-    return str(result_string.value, "utf8")
+    if typeof(value) != JSType.string:
+        string = JSValueRef()
+        c = chakra_core.JsConvertValueToString(value, byref(string))
+        assert c == 0, descriptive_message(c, "js_value_to_string")
+        value = string
+    length = c_int()
+    c = chakra_core.JsGetStringLength(value, byref(length))
+    assert c == 0, descriptive_message(c, "js_value_to_string")
+    buffer = string_scratch.get(length.value)
+    written = c_size_t()
+    c = chakra_core.JsCopyStringUtf16(value, 0, length.value, buffer,
+                                      byref(written))
+    assert c == 0, descriptive_message(c, "js_value_to_string")
+    view = memoryview(buffer).cast("B")[:written.value * 2]
+    return str(view, "utf-16-le", "surrogatepass")
+
+
+if backend == "cffi":
+    from .cffi_wrapper import *  # noqa: E402, F401
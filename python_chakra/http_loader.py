@@ -0,0 +1,178 @@
+"""
+Loader of remote modules.
+All requests go through one `requests.Session`, so connections are pooled
+and kept alive between imports from the same host.
+Responses are stored in an on-disk HTTP cache honouring `ETag`,
+`Last-Modified` and `Cache-Control`.
+"""
+from __future__ import annotations
+
+from hashlib import sha256
+from json import dumps, loads
+from threading import Lock
+from time import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .utils import DiskCache, default_cache_directory
+
+
+__all__ = "HTTPCache", "HTTPLoader", "OfflineError"
+
+
+class OfflineError(ConnectionError):
+    """
+    Raised when a module is requested in offline mode
+    and there is no cached response for it
+    """
+
+
+def _cache_control(header: str) -> Dict[str, Optional[str]]:
+    directives = {}
+    for directive in header.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _max_age(directives: Dict[str, Optional[str]]) -> int:
+    if "no-cache" in directives:
+        return 0
+    try:
+        return max(int(directives.get("max-age") or 0), 0)
+    except ValueError:
+        return 0
+
+
+class HTTPCache(DiskCache):
+    """
+    On-disk cache of HTTP responses keyed by URL.
+    Each entry is a JSON header line with validators and expiry time
+    followed by the body
+    """
+    __slots__ = ()
+
+    def __init__(self, directory: Optional[str] = None, *,
+                 max_size: int = 64 * 1024 * 1024,
+                 enabled: bool = True) -> None:
+        super().__init__(directory or default_cache_directory("http"),
+                         max_size=max_size, enabled=enabled)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return sha256(url.encode()).hexdigest()
+
+    def load(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        if not self.enabled:
+            return None
+        data = self.read(self.key(url))
+        if data is None:
+            return None
+        header, _, body = data.partition(b"\n")
+        try:
+            meta = loads(header)
+        except ValueError:
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta, body
+
+    def store(self, url: str, meta: Dict[str, Any], body: bytes) -> None:
+        if self.enabled:
+            meta["url"] = url
+            self.write(self.key(url), dumps(meta).encode() + b"\n" + body)
+
+
+class HTTPLoader:
+    """
+    Module loader for `http:` and `https:` specifiers,
+    other schemes are passed to the default loader.
+    Plugs into `ModuleRuntime` (and `JSRuntime`) as `loader`.\n
+    `cache` - HTTP cache of responses, `None` disables caching
+    (default: `HTTPCache` in the default directory)\n
+    `offline` - serve only cached responses, even stale ones,
+    and raise `OfflineError` for everything else\n
+    `pool_size` - max number of kept-alive connections per host\n
+    `timeout` - timeout of each request in seconds
+    """
+    __slots__ = "session", "cache", "offline", "timeout", "__lock"
+    session: requests.Session
+    cache: Optional[HTTPCache]
+    offline: bool
+    timeout: float
+
+    def __init__(self, cache: Optional[HTTPCache] = ..., *,
+                 offline: bool = False, pool_size: int = 16,
+                 timeout: float = 30,
+                 session: Optional[requests.Session] = None) -> None:
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size,
+                                  pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.cache = HTTPCache() if cache is ... else cache
+        self.offline = offline
+        self.timeout = timeout
+        # Entries of the same URL are not rewritten concurrently
+        # when the module graph is prefetched
+        self.__lock = Lock()
+
+    def __call__(self, default: Callable[[Any], str], url: Any) -> str:
+        if url.scheme == "http" or url.scheme == "https":
+            return self.fetch(url.href)
+        return default(url)
+
+    def fetch(self, url: str) -> str:
+        """
+        Returns the body of `url`, either from the cache if it is fresh,
+        or revalidated / downloaded from the server
+        """
+        cache = self.cache
+        entry = cache.load(url) if cache is not None else None
+        if entry is not None:
+            meta, body = entry
+            if self.offline or meta.get("expires", 0) > time():
+                return body.decode(meta.get("encoding") or "utf-8")
+        elif self.offline:
+            raise OfflineError(f"{url} is not cached and loader is offline")
+        headers = {}
+        if entry is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        response = self.session.get(url, headers=headers,
+                                    timeout=self.timeout)
+        directives = _cache_control(response.headers.get("Cache-Control",
+                                                         ""))
+        if response.status_code == 304 and entry is not None:
+            meta["expires"] = time() + _max_age(directives)
+            with self.__lock:
+                cache.store(url, meta, body)
+            return body.decode(meta.get("encoding") or "utf-8")
+        response.raise_for_status()
+        text = response.text
+        if cache is not None and "no-store" not in directives:
+            meta = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "expires": time() + _max_age(directives),
+                "encoding": response.encoding,
+            }
+            with self.__lock:
+                cache.store(url, meta, response.content)
+        return text
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> HTTPLoader:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
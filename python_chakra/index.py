@@ -1,21 +1,26 @@
 from __future__ import annotations
 
-from asyncio import Event
+from asyncio import Task, gather, get_running_loop, sleep
 from asyncio.events import get_event_loop
 from collections import UserString
 from collections.abc import MutableSequence
 from inspect import Parameter, iscoroutinefunction, isfunction, signature
-from math import ceil, floor, trunc
+from math import ceil, copysign, floor, trunc
+from math import e as _e, inf as _inf, pi as _pi, tau as _tau
 from numbers import Number as _Number
 from os import getcwd
 from sys import maxsize, version_info
 from traceback import format_exception
+from weakref import finalize
 from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Generator, \
     Optional, Set, Tuple, TypeVar, Union, overload
 
+from .bytecode_cache import BytecodeCache
 from .dll_wrapper import *
-from .modules import JSModule, ModuleRuntime, default_loader, \
-    default_path_resolver
+from .http_loader import HTTPCache, HTTPLoader, OfflineError  # noqa: F401
+from .modules import JSModule, LoaderFunctionType, ModuleCache, \
+    ModuleRuntime, default_loader, default_path_resolver, \
+    load_source  # noqa: F401
 from .utils import BaseValue
 
 
@@ -97,6 +102,8 @@ class Object(BaseValue, SupportsLazyInit):
     __lazy__: __Lazy__
     __initialized__: bool
     _as_parameter_: JSValueRef = Fridge["Object"]()
+    # Weak references (see `_track`) come from `BaseValue`,
+    # which has no `__slots__`
     __slots__ = "__lazy__", "__initialized__"
 
     def __init__(self, value: Optional[JSValueRef] = None, *,
@@ -108,7 +115,7 @@ class Object(BaseValue, SupportsLazyInit):
             self.__initialized__ = True
             self._as_parameter_ = value
             add_ref(self)
-            _refs.append(self)
+            _track(self)
             if attach_to_global_as is not None:
                 if type(attach_to_global_as) is not str:
                     raise TypeError()
@@ -159,6 +166,213 @@ class Object(BaseValue, SupportsLazyInit):
         return True
 
 
+def _to_js_value(r: Any) -> Any:
+    if r is True:
+        r = js_true
+    if r is False:
+        r = js_false
+    if type(r) is str:
+        r = intern_js_string(r)
+    if type(r) in (int, float):
+        r = to_number(r)
+    if r is None:
+        r = js_undefined
+    return r
+
+
+def _return_any(r: Any) -> Optional[int]:
+    r = walk_asparam_chain(_to_js_value(r))
+    return r.value if type(r) is JSValueRef else r
+
+
+def _return_raw(r: Any) -> Optional[int]:
+    r = walk_asparam_chain(r)
+    return r.value if type(r) is JSValueRef else r
+
+
+def _return_bool(r: Any) -> int:
+    return js_true.value if r else js_false.value
+
+
+def _return_str(r: Any) -> int:
+    return intern_js_string(r).value
+
+
+def _return_number(r: Any) -> int:
+    return to_number(r).value
+
+
+def _return_undefined(_: Any) -> int:
+    return js_undefined.value
+
+
+# Return annotations of jsfuncs mapped to their return converters,
+# strings are there for modules using postponed annotations
+_RETURN_CONVERTERS: Dict[Any, Callable[[Any], Optional[int]]] = {
+    bool: _return_bool, "bool": _return_bool,
+    str: _return_str, "str": _return_str,
+    int: _return_number, "int": _return_number,
+    float: _return_number, "float": _return_number,
+    None: _return_undefined, "None": _return_undefined,
+}
+_NativeFunction = CFUNCTYPE(c_void_p, JSValueRef, c_bool,
+                            POINTER(JSValueRef), c_ushort, c_void_p)
+
+
+def _error_from_exception(ex: BaseException) -> JSValueRef:
+    message = format_exception(type(ex), ex, ex.__traceback__)
+    return create_error('\n'.join(message))
+
+
+def _settle_later(coroutine: Awaitable, promise: JSValueRef,
+                  resolve: JSValueRef, reject: JSValueRef,
+                  convert: Callable[[Any], Optional[int]]) -> bool:
+    """
+    Runs `coroutine` as a task of the running event loop and settles
+    `promise` when it is done. Returns `False` if no loop is running
+    """
+    try:
+        loop = get_running_loop()
+    except RuntimeError:
+        return False
+    runtime = _runtime
+    refs = promise, resolve, reject
+    for ref in refs:
+        add_ref(ref)
+
+    def settle(task: Task) -> None:
+        _pending_tasks.discard(task)
+        if _runtime is not runtime:
+            # The runtime is gone together with the promise
+            return
+        try:
+            try:
+                if task.cancelled():
+                    settler = reject
+                    value = create_error("Coroutine was cancelled")
+                elif task.exception() is not None:
+                    settler = reject
+                    value = _error_from_exception(task.exception())
+                else:
+                    settler, value = resolve, convert(task.result())
+            except Exception as e:
+                # Otherwise JS awaits the promise forever
+                settler, value = reject, _error_from_exception(e)
+            call(settler, value)
+        finally:
+            for ref in refs:
+                js_release(ref)
+        promise_queue.exec()
+
+    task = loop.create_task(coroutine)
+    task.add_done_callback(settle)
+    _pending_tasks.add(task)
+    return True
+
+
+def _argument_reader(positional: int, padded: int, fill_value: Any
+                     ) -> Callable[[Any, int], List[JSValueRef]]:
+    """
+    Returns a function reading up to `positional` JS arguments,
+    padded with `fill_value` up to `padded` arguments
+    """
+    # Index 0 is `this`
+    stop = positional + 1
+    if stop == 1:
+        return lambda args, argc: []
+    fill = [fill_value] * padded
+
+    def read(args, argc):
+        end = argc if argc < stop else stop
+        values = [JSValueRef(args[i]) for i in range(1, end)]
+        if end <= padded:
+            values.extend(fill[end - 1:padded])
+        return values
+    return read
+
+
+def _trampoline(function: Callable, name: str, constructor: bool,
+                read: Callable[[Any, int], List[JSValueRef]],
+                extras: Set[str],
+                convert: Callable[[Any], Optional[int]]) -> Callable:
+    """
+    Native function calling a synchronous jsfunc,
+    everything known from the signature is decided here, once
+    """
+    if not extras:
+        def trampoline(callee, new_call, args, argc, _):
+            if new_call and not constructor:
+                throw(create_type_error(f"{name} is not a constructor"))
+                return None
+            try:
+                return convert(function(*read(args, argc)))
+            except Exception as ex:
+                throw(_error_from_exception(ex))
+        return _NativeFunction(trampoline)
+    wants_this = "this" in extras
+    wants_new_call = "new_call" in extras
+    wants_callee = "callee" in extras
+
+    def trampoline(callee, new_call, args, argc, _):
+        if new_call and not constructor:
+            throw(create_type_error(f"{name} is not a constructor"))
+            return None
+        try:
+            kwargs = {}
+            if wants_this:
+                kwargs["this"] = JSValueRef(args[0]) if argc else None
+            if wants_new_call:
+                kwargs["new_call"] = bool(new_call)
+            if wants_callee:
+                kwargs["callee"] = JSValueRef(callee)
+            return convert(function(*read(args, argc), **kwargs))
+        except Exception as ex:
+            throw(_error_from_exception(ex))
+    return _NativeFunction(trampoline)
+
+
+def _coroutine_trampoline(function: Callable, name: str, constructor: bool,
+                          read: Callable[[Any, int], List[JSValueRef]],
+                          extras: Set[str],
+                          convert: Callable[[Any], Optional[int]]
+                          ) -> Callable:
+    """
+    Native function calling a coroutine jsfunc,
+    it always returns a promise
+    """
+    wants = {extra: extra in extras for extra in _COROUTINE_EXTRAS}
+
+    def trampoline(callee, new_call, args, argc, _):
+        if new_call and not constructor:
+            throw(create_type_error(f"{name} is not a constructor"))
+            return None
+        promise, resolve, reject = create_promise()
+        try:
+            kwargs = {}
+            if wants["this"]:
+                kwargs["this"] = JSValueRef(args[0]) if argc else None
+            if wants["new_call"]:
+                kwargs["new_call"] = bool(new_call)
+            if wants["callee"]:
+                kwargs["callee"] = JSValueRef(callee)
+            if wants["resolve"]:
+                kwargs["resolve"] = Function(resolve)
+            if wants["reject"]:
+                kwargs["reject"] = Function(reject)
+            r = function(*read(args, argc), **kwargs)
+            if not _settle_later(r, promise, resolve, reject, convert):
+                r = get_event_loop().run_until_complete(r)
+                call(resolve, convert(r))
+        except Exception as ex:
+            call(reject, _error_from_exception(ex))
+        return promise.value
+    return _NativeFunction(trampoline)
+
+
+_EXTRAS = "this", "new_call", "callee"
+_COROUTINE_EXTRAS = _EXTRAS + ("resolve", "reject")
+
+
 def jsfunc(fname: str = None, *, constructor: bool = False,
            fill_value: Any = None,
            attach_to_global_as: GlobalAttachments = None,
@@ -190,19 +404,23 @@ def jsfunc(fname: str = None, *, constructor: bool = False,
     `attach_to_as`: `Optional[str]` - name used when attaching the function to
     object from `attach_to` argument (default: `fname`)\n
     `wrap_returns`: `Optional[bool]` - indicates if function's return value
-    must be wrapped into valid JS value (default: `True`)
+    must be wrapped into valid JS value, return annotations `bool`, `str`,
+    `int`, `float` and `None` pick a direct conversion (default: `True`)\n
+    Coroutine functions return a pending promise, which is settled
+    when the coroutine finishes on the running event loop.
+    Without a running loop the coroutine is run to completion in place
     """
     def wrapper(function: _T) -> _T:
         nonlocal attach_to, attach_to_as, attach_to_global_as
         assert isfunction(function)
         name = fname if fname is not None else function.__name__
         is_coro_func = iscoroutinefunction(function)
-        params = signature(function).parameters
+        function_signature = signature(function)
         max_args_limit = 0
         min_args_limit = 0
         kws = set()
         all_kws = False
-        for param in params.values():
+        for param in function_signature.parameters.values():
             if param.kind == Parameter.KEYWORD_ONLY:
                 kws.add(param.name)
             if version_info >= (3, 9) and \
@@ -215,77 +433,34 @@ def jsfunc(fname: str = None, *, constructor: bool = False,
                 max_args_limit = 0x66666
             if param.kind == Parameter.VAR_KEYWORD:
                 all_kws = True
+        read = _argument_reader(max_args_limit, min_args_limit, fill_value)
+        if wrap_returns:
+            try:
+                convert = _RETURN_CONVERTERS.get(
+                    function_signature.return_annotation, _return_any)
+            except TypeError:
+                # Unhashable annotation
+                convert = _return_any
+        else:
+            convert = _return_raw
+        if is_coro_func:
+            extras = {kw for kw in _COROUTINE_EXTRAS
+                      if all_kws or kw in kws}
+            dummy = _coroutine_trampoline(function, name, constructor, read,
+                                          extras, convert)
+        else:
+            extras = {kw for kw in _EXTRAS if all_kws or kw in kws}
+            dummy = _trampoline(function, name, constructor, read, extras,
+                                convert)
 
-        @CFUNCTYPE(c_void_p, JSValueRef, c_bool,
-                   POINTER(POINTER(JSValueRef)),
-                   c_ushort, c_void_p)
-        def dummy(callee, new_call, args, argc, _):
-            if new_call and not constructor:
-                throw(create_type_error(f"{name} is not a constructor"))
-            else:
-                try:
-                    kwargs = {}
-                    if argc == 0:
-                        this = None
-                    else:
-                        this = args[0]
-                    if all_kws or "this" in kws:
-                        kwargs["this"] = this
-                    if all_kws or "new_call" in kws:
-                        kwargs["new_call"] = bool(new_call)
-                    if all_kws or "callee" in kws:
-                        kwargs["callee"] = callee
-                    args: list = list(c_array_to_iterator(args, argc, 1))
-                    args.extend([fill_value] * (min_args_limit - len(args)))
-                    if is_coro_func:
-                        promise, resolve, reject = create_promise()
-                        if all_kws or "resolve" in kws:
-                            kwargs["resolve"] = Function(resolve)
-                        if all_kws or "reject" in kws:
-                            kwargs["reject"] = Function(reject)
-                    else:
-                        kwargs = _empty_dict
-                    r = function(*(args[:max_args_limit]), **kwargs)
-                    if is_coro_func:
-                        loop = get_event_loop()
-                        r = loop.run_until_complete(r)
-                    if wrap_returns:
-                        if r is True:
-                            r = js_true
-                        if r is False:
-                            r = js_false
-                        if type(r) is str:
-                            r = str_to_js_string(r)
-                        if type(r) in (int, float):
-                            r = to_double(r)
-                        if r is None:
-                            r = js_undefined
-                    r = walk_asparam_chain(r)
-                    if is_coro_func:
-                        call(resolve, r.value)
-                        return promise.value
-                    if type(r) is JSValueRef:
-                        r = r.value
-                    return r
-                except Exception as ex:
-                    message = format_exception(type(ex), ex,
-                                               ex.__traceback__)
-                    error = create_error('\n'.join(message))
-                    if is_coro_func:
-                        call(reject, error)
-                        return promise.value
-                    else:
-                        throw(error)
-
-        _frefs.append(dummy)
         if _runtime is None:
             class _(SupportsLazyInit):
                 def __lazy_init__(_):
-                    function._as_parameter_ = create_function(dummy, name)
+                    function._as_parameter_ = _create_jsfunc(dummy, name)
 
             lazy_function_queue.append(_())
         else:
-            function._as_parameter_ = create_function(dummy, name)
+            function._as_parameter_ = _create_jsfunc(dummy, name)
         if attach_to_global_as:
             if attach_to_global_as is True:
                 if name is None:
@@ -316,22 +491,33 @@ def jsfunc(fname: str = None, *, constructor: bool = False,
 
 
 class Number(BaseValue, _Number):
-    __slots__ = "_as_parameter_", "value"
-    _as_parameter_: JSValueRef
+    """
+    JS number kept as python float, so arithmetic never calls the engine.
+    Its JS value is created when `_as_parameter_` is first read,
+    small integers and common constants share cached handles
+    """
+    __slots__ = "value", "__handle"
     value: float
 
     def __init__(self, value: NumberLike) -> None:
         if type(value) is Number:
-            # Borrow properties from Number
-            # for a small optimization (speed + memory)
-            self._as_parameter_ = value._as_parameter_
+            # Borrow the handle, if any, it stays valid
+            # until this number changes
             self.value = value.value
+            self.__handle = value.__handle
         else:
-            self._as_parameter_ = to_number(value)
-            self.value = to_double(value)
+            self.value = _to_float(value)
+            self.__handle = None
+
+    @property
+    def _as_parameter_(self) -> JSValueRef:
+        handle = self.__handle
+        if handle is None:
+            handle = self.__handle = _number_handle(self.value)
+        return handle
 
     def __update(self) -> Number:
-        self._as_parameter_ = to_number(self.value)
+        self.__handle = None
         return self
 
     def as_integer_ratio(self) -> Tuple[int, int]:
@@ -474,7 +660,11 @@ class String(BaseValue, UserString):
         if type(seq) is JSValueRef:
             seq = js_value_to_string(seq)
         super().__init__(seq)
+        # Not interned, the cache may release its entries
+        # while this wrapper is still alive
         self._as_parameter_ = str_to_js_string(self.data)
+        add_ref(self)
+        _track(self)
 
 
 class Function(Object, Callable):
@@ -491,18 +681,23 @@ class Function(Object, Callable):
 
 
 class Promise(Object, Awaitable):
-    __slots__ = "__event",
+    __slots__ = ()
     _as_parameter_: JSValueRef = Fridge["Promise"]()
-    _event: Event
 
     @staticmethod
     def _run_coro_like(F, *args: Any, **kwargs: Dict[str, Any]) -> Any:
         if iscoroutinefunction(F):
-            loop = get_event_loop()
-            r = loop.run_until_complete(F(*args, **kwargs))
-        else:
-            r = F(*args, **kwargs)
-        return r
+            try:
+                loop = get_running_loop()
+            except RuntimeError:
+                loop = get_event_loop()
+                return loop.run_until_complete(F(*args, **kwargs))
+            # `F` settles the promise itself through resolve / reject
+            task = loop.create_task(F(*args, **kwargs))
+            _pending_tasks.add(task)
+            task.add_done_callback(_pending_tasks.discard)
+            return task
+        return F(*args, **kwargs)
 
     @staticmethod
     def _resolve(value: JSValueRef) -> JSValueRef:
@@ -530,24 +725,34 @@ class Promise(Object, Awaitable):
         def handler(resolve, reject):
             vals = list(values)
             length = len(vals)
-            result = list(vals)
-            done = 0
-            for i, value in enumerate(vals):
-                p = Promise._resolve(value)
-
-                def capture(p, i):
-                    @jsfunc()
-                    def handler(value, **_):
-                        nonlocal done
-                        result[i] = value
-                        done += 1
-                        if done == length:
-                            resolve(Array(result))
-
-                    call(Fridge["Promise"]["prototype"]["then"](),
-                         handler, reject, this=p)
+            # Values are stored right away, they are only valid
+            # while the settlement callback runs
+            result = create_array(length)
+            if length == 0:
+                resolve(result)
+                return
+            add_ref(result)
+            remaining = length
+
+            def capture(i):
+                def settled(fulfilled, value):
+                    nonlocal remaining
+                    if remaining == 0:
+                        return
+                    if fulfilled:
+                        set_property(result, i, value)
+                        remaining -= 1
+                        if remaining:
+                            return
+                        resolve(result)
+                    else:
+                        remaining = 0
+                        reject(value)
+                    js_release(result)
+                return settled
 
-                capture(p, i)
+            for i, value in enumerate(vals):
+                on_settled(value, capture(i))
         return Promise(handler)
 
     def all_async_gen(*args: Promise) -> AsyncGenerator[JSValueRef, None]:
@@ -573,20 +778,15 @@ class Promise(Object, Awaitable):
         return True
 
     async def __wait__(self) -> JSValueRef:
-        if not hasattr(self, "_event") or self._event.is_set():
-            event = self._event if hasattr(self, "_event") else Event()
-            event.clear()
+        if get_promise_state(self) == JSPromiseStates.Pending:
+            future = get_running_loop().create_future()
 
-            @jsfunc()
-            def callback(_, **_2):
-                event.set()
+            def settled(*_):
+                if not future.done():
+                    future.set_result(None)
 
-            call(Fridge["Promise"]["prototype"]["then"](), callback, this=self)
-            self._event = event
-        else:
-            event = self._event
-
-        await event.wait()
+            on_settled(self, settled)
+            await future
 
         state = get_promise_state(self)
         if state == JSPromiseStates.Resolved:
@@ -610,6 +810,140 @@ class Array(Object, MutableSequence):
         return True
 
 
+def _storage_view(owner: Object, address: int, length: int) -> memoryview:
+    """
+    Returns byte memoryview over engine storage at `address`.
+    The view keeps `owner` and thereby its JS value alive,
+    it is valid until the buffer is detached or the runtime exits
+    """
+    storage = (c_char * length).from_address(address)
+    storage.owner = owner
+    return memoryview(storage).cast("B")
+
+
+class ArrayBuffer(Object):
+    """
+    `ArrayBuffer(size)` allocates zeroed storage owned by the engine,
+    `ArrayBuffer(data)` shares memory of python buffer `data`
+    (`bytearray`, `mmap`, `array.array`, ...) without copying,
+    see `wrap_buffer`
+    """
+    __slots__ = ()
+    _as_parameter_: JSValueRef = Fridge["ArrayBuffer"]()
+
+    def __init__(self, value: Union[JSValueRef, int, Any] = 0) -> None:
+        if type(value) is int:
+            value = create_array_buffer(value)
+        elif type(walk_asparam_chain(value)) is not JSValueRef:
+            value = wrap_buffer(value)
+        super().__init__(value)
+
+    def as_memoryview(self) -> memoryview:
+        """
+        Returns writable byte view over buffer's storage without copying
+        """
+        return _storage_view(self, *get_array_buffer_storage(self))
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self.as_memoryview()
+
+    def __len__(self) -> int:
+        return get_array_buffer_storage(self)[1]
+
+    def is_array_buffer(self) -> Literal[True]:
+        return True
+
+
+class TypedArray(Object):
+    """
+    `TypedArray(data)` creates TypedArray over memory of python buffer
+    `data` without copying, its type is taken from buffer's format
+    (see `typed_array_kind`), `kind` overrides it.
+    `TypedArray(array_buffer, kind)` views ArrayBuffer
+    """
+    __slots__ = ()
+
+    def __init__(self, value: Union[JSValueRef, Any],
+                 kind: Optional[JSTypedArrayType] = None) -> None:
+        ref = walk_asparam_chain(value)
+        if type(ref) is not JSValueRef:
+            if kind is None:
+                view = memoryview(value)
+                kind = typed_array_kind(view.format, view.itemsize)
+                if kind is None:
+                    raise TypeError(f"No TypedArray for elements of format "
+                                    f"{view.format!r}")
+            ref = wrap_buffer(value)
+        if typeof(ref) == JSType.arraybuffer:
+            ref = create_typed_array(JSTypedArrayType.Uint8
+                                     if kind is None else kind, ref)
+        super().__init__(ref)
+
+    @property
+    def kind(self) -> JSTypedArrayType:
+        return JSTypedArrayType(get_typed_array_info(self)[0])
+
+    @property
+    def buffer(self) -> ArrayBuffer:
+        return ArrayBuffer(get_typed_array_info(self)[1])
+
+    @property
+    def byte_offset(self) -> int:
+        return get_typed_array_info(self)[2]
+
+    def as_memoryview(self) -> memoryview:
+        """
+        Returns writable view over array's elements without copying,
+        formatted as its element type
+        """
+        address, length, kind, _ = get_typed_array_storage(self)
+        return _storage_view(self, address, length).cast(
+            typed_array_formats[kind])
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self.as_memoryview()
+
+    def __len__(self) -> int:
+        _, length, _, size = get_typed_array_storage(self)
+        return length // size
+
+    def is_typed_array(self) -> Literal[True]:
+        return True
+
+
+class DataView(Object):
+    """
+    `DataView(data, offset, length)` creates DataView over
+    ArrayBuffer or memory of python buffer `data` without copying
+    """
+    __slots__ = ()
+    _as_parameter_: JSValueRef = Fridge["DataView"]()
+
+    def __init__(self, value: Union[JSValueRef, Any], offset: int = 0,
+                 length: Optional[int] = None) -> None:
+        ref = walk_asparam_chain(value)
+        if type(ref) is not JSValueRef:
+            ref = wrap_buffer(value)
+        if typeof(ref) == JSType.arraybuffer:
+            ref = create_data_view(ref, offset, length)
+        super().__init__(ref)
+
+    def as_memoryview(self) -> memoryview:
+        """
+        Returns writable byte view over DataView's range without copying
+        """
+        return _storage_view(self, *get_data_view_storage(self))
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self.as_memoryview()
+
+    def __len__(self) -> int:
+        return get_data_view_storage(self)[1]
+
+    def is_data_view(self) -> Literal[True]:
+        return True
+
+
 class LogicalError(Exception):
     pass
 
@@ -694,22 +1028,117 @@ class Null(BaseValue):
         return True
 
 
+class CompiledScript:
+    """
+    A script parsed once by `JSRuntime.compile` and runnable many times.
+    When the script was compiled with parameters, its source is a function
+    body, so its result has to be returned with `return` statement
+    """
+    __slots__ = "_as_parameter_", "name", "params", "__weakref__"
+    _as_parameter_: JSValueRef
+    name: str
+    params: Tuple[str, ...]
+
+    def __init__(self, function: JSValueRef, name: str,
+                 params: Tuple[str, ...] = ()) -> None:
+        self._as_parameter_ = function
+        self.name = name
+        self.params = params
+        add_ref(function)
+        _track(self)
+
+    def run(self, *args: Any) -> JSValueRef:
+        return call(self, *args)
+
+    __call__ = run
+
+    def __repr__(self) -> str:
+        return f"CompiledScript(name={self.name!r}, params={self.params!r})"
+
+
+# Wrappers created before the runtime, they are pinned until it exits
 _refs = []
-_frefs = []
-_empty_dict = dict()
+# Native thunks of jsfuncs by address of their JS function
+_frefs: Dict[int, Any] = {}
+# Addresses of collected jsfuncs whose thunks are dropped outside GC
+_collected_thunks: List[int] = []
+# Bumped when a runtime is created or disposed, so finalizers
+# of wrappers from a previous runtime don't touch the current one
+_generation = 0
+# Tasks of coroutine jsfuncs which haven't settled their promises yet
+_pending_tasks: Set[Task] = set()
+# Default parse attributes with ArrayBufferIsUtf16Encoded (0x2) cleared
+_UTF8_SCRIPT = 0x20
+
+
+def _release_handle(address: int, generation: int) -> None:
+    if generation == _generation:
+        js_release(address)
+
+
+def _track(wrapper: Any) -> None:
+    """
+    Releases wrapper's JS handle when the wrapper is garbage-collected
+    """
+    handle = walk_asparam_chain(wrapper)
+    address = handle if type(handle) is int else cast(handle, c_void_p).value
+    finalize(wrapper, _release_handle, address, _generation)
+
+
+@CFUNCTYPE(None, c_void_p, c_void_p)
+def _reclaim_thunk(address, _):
+    # The JS function is collected, nothing can call its thunk anymore.
+    # Dropping it here may finalize captured wrappers, no engine calls
+    # during GC
+    _collected_thunks.append(address)
+
+
+def _release_thunks() -> None:
+    """
+    Drops thunks of jsfuncs collected by the engine
+    """
+    while _collected_thunks:
+        _frefs.pop(_collected_thunks.pop(), None)
+
+
+def _create_jsfunc(thunk: Any, name: str) -> JSValueRef:
+    _release_thunks()
+    function = create_function(thunk, name)
+    _frefs[function.value] = thunk
+    set_before_collect_callback(function, _reclaim_thunk)
+    return function
+
+
 NumberLike = Union[Number, JSValueRef, int, float]
 AttachName = Union[str, Literal[True]]
 GlobalAttachments = Union[Tuple[AttachName, ...], List[AttachName],
                           Set[AttachName], AttachName, None]
 _runtime: JSRef = None
 global_this = Object(js_globalThis)
-Number._as_parameter_ = Fridge["Number"]()
 true = Boolean(js_true)
 false = Boolean(js_false)
 undefined = Undefined()
 null = Null()
 
 
+# Handles of small integers and common constants by value,
+# pinned until the runtime exits
+_number_handles: Dict[float, JSValueRef] = {}
+_CACHED_NUMBERS = frozenset(range(-128, 1025)) | {0.5, _inf, -_inf, _e,
+                                                  _pi, _tau}
+
+
+def _number_handle(value: float) -> JSValueRef:
+    # -0.0 == 0.0, but it is a different JS value
+    if value in _CACHED_NUMBERS and (value or copysign(1.0, value) > 0):
+        handle = _number_handles.get(value)
+        if handle is None:
+            handle = _number_handles[value] = to_number(value)
+            add_ref(handle)
+        return handle
+    return to_number(value)
+
+
 def _to_float(other: NumberLike) -> float:
     if type(other) is float:
         return other
@@ -723,49 +1152,173 @@ def _to_float(other: NumberLike) -> float:
 
 class JSRuntime:
     __slots__ = "_as_parameter_", "__flags", "__runtime", "__context", \
-        "__module_runtime"
+        "__module_runtime", "__string_cache_size", "__bytecode_cache", \
+        "__drain_scheduled"
     __module_runtime: ModuleRuntime
     __runtime: Optional[JSRef]
     __context: Optional[JSRef]
+    __bytecode_cache: Optional[BytecodeCache]
     _as_parameter_: Optional[JSRef]
     flags: int
 
-    def __init__(self, *, flags: int = 0x22) -> None:
+    def __init__(self, *, flags: int = 0x22,
+                 string_cache_size: int = 0,
+                 bytecode_cache: Union[BytecodeCache, bool, None] = None,
+                 module_cache: Union[ModuleCache, bool, None] = None,
+                 prefetch_workers: int = 0,
+                 module_loader: Optional[LoaderFunctionType] = None
+                 ) -> None:
+        """
+        `string_cache_size` - how many JS strings created from python
+        strings (jsfunc return values, error messages, etc.) are kept
+        pinned for reuse, caching is disabled when it is 0
+        (see `js_string_cache`)\n
+        `bytecode_cache` - cache of parsed scripts used by `exec_script`,
+        `True` means a `BytecodeCache` in the default directory
+        (`PYTHON_CHAKRA_CACHE_DIR` or `~/.cache/python_chakra`)
+        (default: `None`, scripts are always parsed from source)\n
+        `module_cache` - cache of transformed data modules
+        (JSON, YAML, TOML, CSV, XML), `True` means a `ModuleCache`
+        in the default directory (default: `None`, no caching)\n
+        `prefetch_workers` - number of threads loading module's dependency
+        graph ahead of the engine in `exec_module`, loaders must be
+        thread-safe when it is enabled (default: 0, no prefetching)\n
+        `module_loader` - loader hook called with the default loader
+        and module's URL, e.g. `HTTPLoader()` for pooled and cached
+        remote imports (default: `None`, `default_loader`)
+        """
         global _runtime
         if _runtime:
             raise LogicalError("A runtime is already created!")
         self.__flags = flags
+        self.__string_cache_size = string_cache_size
+        if bytecode_cache is True:
+            bytecode_cache = BytecodeCache()
+        self.__bytecode_cache = bytecode_cache or None
         self.__runtime = JSRef()
         self.__context = JSRef()
-        self.__module_runtime = ModuleRuntime(self)
+        if module_cache is True:
+            module_cache = ModuleCache()
+        self.__module_runtime = ModuleRuntime(
+            self, loader=module_loader, cache=module_cache or None,
+            prefetch_workers=prefetch_workers)
         self._as_parameter_ = None
+        self.__drain_scheduled = False
         promise_queue.clear()
         lazy_function_queue.append(Fridge)
 
     def exec_module(self, specifier: str) -> None:
         module_runtime = self.__module_runtime
         spec = module_runtime.path_resolver(self.__get_base(), specifier)
-        code = module_runtime.loader(spec)
-        module = JSModule(spec, code)
-        module_runtime.add_module(str(spec), module)
-        module.parse()
+        module_runtime.exec_root(spec)
+
+    def reload_modules(self) -> Set[str]:
+        """
+        Reloads modules changed on disk together with modules
+        importing them, the rest of the module graph stays as is.
+        Returns specifiers of reloaded modules
+        """
+        return self.__module_runtime.reload_changed()
+
+    async def watch_modules(self, interval: float = 1.0) -> None:
+        """
+        Keeps reloading changed modules every `interval` seconds
+        until cancelled
+        """
+        await self.__module_runtime.watch(interval)
 
     def __get_base(self):
         return "file://" + getcwd() + "/"
 
+    def compile(self, source: str, name: str = "<compiled>",
+                params: Iterable[str] = ()) -> CompiledScript:
+        """
+        Parses `source` once and returns a handle which runs it when called.
+        If `params` are given, `source` becomes the body of a function with
+        these parameters, and the handle accepts matching arguments
+        """
+        params = tuple(params)
+        if params:
+            source = f"(function ({', '.join(params)}) {{\n{source}\n}})"
+        source = source.encode("utf-8")
+        script = create_external_array_buffer(source)
+        function = parse_script(script, create_c_string(name), _UTF8_SCRIPT)
+        if params:
+            function = call(function)
+        return CompiledScript(function, name, params)
+
     def exec_script(self, specifier: str, async_: bool = True) -> None:
+        self.__run_script(specifier, async_)
+        promise_queue.exec()
+
+    async def exec_script_async(self, specifier: str) -> JSValueRef:
+        """
+        Runs the script on the running event loop and waits
+        until its top-level `await`s finish, returns script's result
+        """
+        result = self.__run_script(specifier, True)
+        promise_queue.exec()
+        return await Promise(result)
+
+    async def exec_module_async(self, specifier: str) -> None:
+        """
+        Runs the module on the running event loop and waits
+        until all coroutine jsfuncs it has called are settled
+        """
+        self.exec_module(specifier)
+        await self.wait_pending()
+
+    async def wait_pending(self) -> None:
+        """
+        Waits until promises of all coroutine jsfuncs are settled,
+        including ones called by JS code while waiting
+        """
+        while _pending_tasks:
+            await gather(*_pending_tasks, return_exceptions=True)
+            # Let the scheduled microtask drain run
+            await sleep(0)
+
+    def __run_script(self, specifier: str, async_: bool) -> JSValueRef:
         fileurl = default_path_resolver(self.__get_base(), specifier)
-        script = default_loader(fileurl)
+        # UTF-8 bytes (or a memory map) go to the engine as is
+        script = load_source(fileurl)
         if async_:
-            script = f"(async()=>{{{script}}})()"
-        script = create_string_buffer(script.encode("UTF-16"))
-        buffer = create_external_array_buffer(script)
-        run_script(buffer, create_c_string(str(fileurl)))
-        promise_queue.exec()
+            script = b"(async()=>{%b})()" % script
+        if self.__bytecode_cache is None:
+            buffer = create_external_array_buffer(buffer_view(script))
+            return run_script(buffer, create_c_string(str(fileurl)),
+                              _UTF8_SCRIPT)
+        return self.__bytecode_cache.run(script, str(fileurl), _UTF8_SCRIPT,
+                                         flags=self.__flags)
 
     def __queue_promise(self, task: JSValueRef) -> None:
         add_ref(task)
         promise_queue.append(task)
+        if self.__drain_scheduled:
+            return
+        try:
+            loop = get_running_loop()
+        except RuntimeError:
+            # Drained by whoever runs JS code synchronously
+            return
+        self.__drain_scheduled = True
+        loop.call_soon(self.__drain)
+
+    def __drain(self) -> None:
+        self.__drain_scheduled = False
+        if self._as_parameter_ and not promise_queue.executing:
+            promise_queue.exec()
+
+    def handle_scope(self) -> HandleScope:
+        """
+        Returns a context manager pinning handles returned by `call`,
+        `construct`, `get_property` and `to_number` inside its block and
+        releasing all of them at once on exit.
+        Use `scope.escape(value)` to keep a value alive after the block:\n
+        with runtime.handle_scope() as scope:
+            result = scope.escape(call(f, get_property(obj, "x")))
+        """
+        return HandleScope()
 
     def memory_limit(self, limit: int = None) -> Optional[int]:
         if limit is None:
@@ -776,15 +1329,25 @@ class JSRuntime:
     def memory_usage(self) -> int:
         return get_runtime_memory_usage(self)
 
+    def collect_garbage(self) -> None:
+        """
+        Runs a full garbage collection of the engine,
+        finalizers of collected JS values run before it returns
+        """
+        collect_garbage(self)
+        _release_thunks()
+
     def exit_and_reenter(self) -> None:
         self.__exit__()
         return self.__enter__()
 
     def __enter__(self) -> JSRuntime:
-        global _runtime
+        global _runtime, _generation
+        _generation += 1
         self.__runtime = create_runtime(self.__flags)
         _runtime = self.__runtime
         self._as_parameter_ = _runtime
+        js_string_cache.capacity = self.__string_cache_size
         self.__context = create_context(self)
         set_current_context(self.__context)
 
@@ -806,7 +1369,9 @@ class JSRuntime:
         return self
 
     def __exit__(self, *_: Any) -> None:
-        global _runtime, _frefs
+        global _runtime, _frefs, _generation
+        # Handles of wrappers still alive go away with the runtime
+        _generation += 1
         try:
             for module in self.__module_runtime.modules.values():
                 module.dispose()
@@ -821,11 +1386,29 @@ class JSRuntime:
         except Exception as e:
             print("Failed to dispose object references, error:", e)
         _frefs.clear()
+        _collected_thunks.clear()
+        for scope in handle_scopes:
+            scope.abandon()
+        handle_scopes.clear()
+        for task in _pending_tasks:
+            task.cancel()
+        _pending_tasks.clear()
+        try:
+            js_string_cache.clear()
+            js_string_cache.capacity = 0
+            release_serialized_sources()
+        except Exception as e:
+            print("Failed to release cached values, error:", e)
         try:
             set_current_context(0)
             dispose_runtime(self)
         except Exception as e:
             print("Failed to dispose runtime, error:", e)
+        Fridge.invalidate()
+        external_buffers.clear()
+        _number_handles.clear()
+        property_ids.clear()
+        string_scratch.release()
         self.__runtime = None
         _runtime = None
         self.__context = None
@@ -1,30 +1,35 @@
 from __future__ import annotations
 
+from asyncio import sleep
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from csv import reader
 from ctypes import CFUNCTYPE, POINTER, c_int, c_void_p
 from xml.etree.ElementTree import Element
 from functools import partial
+from json import dumps
 from json.decoder import JSONDecoder
-from os import getcwd, name, urandom
+from hashlib import sha256
+from mmap import ACCESS_COPY, mmap
+from os import fstat, getcwd, name, stat, urandom
 from os.path import dirname
 from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, \
-    TypeVar, Union
+    Set, Tuple, TypeVar, Union
 
 import regex as re
-import requests
 from defusedxml.ElementTree import fromstring
 from toml import loads
 from whatwg_url import Url as URL, is_valid_url, parse_url
 from yaml import safe_load
 
 from .dll_wrapper import JSModuleRecord, JSRef, JSValueRef, add_ref, \
-    init_module_record, js_release, js_value_to_string, parse_module_source, \
-    promise_queue, run_module, set_fetch_importing_module_callback, \
+    buffer_view, init_module_record, js_release, js_value_to_string, \
+    parse_module_source, promise_queue, run_module, \
+    set_fetch_importing_module_callback, \
     set_fetch_importing_module_from_script_callback, \
     set_import_meta_callback, set_module_notify_callback, \
-    set_module_ready_callback, set_property, set_url, str_to_array, \
-    str_to_js_string
-from .utils import FIFOQueue, cookies
+    set_module_ready_callback, set_property, set_url, str_to_js_string
+from .http_loader import HTTPLoader
+from .utils import DiskCache, FIFOQueue, cookies, default_cache_directory
 
 
 def flatten(i: Iterable[Iterable[_T]]) -> Generator[_T, None, None]:
@@ -44,20 +49,31 @@ def _gen_random_name():
     return f"__$$${urandom(8).hex()}$$$__"
 
 
+def _is_binding_name(key: Any, regex: Any) -> bool:
+    if type(key) is not str or key in _KEYWORDS:
+        return False
+    return re.search(regex, key) is not None
+
+
 class JSModule:
     __slots__ = "_as_parameter_", "spec", "code", "cookie", "directory", \
-                "fullpath", "parent", "root"
+                "fullpath", "parent", "root", "source"
     root: bool
     spec: JSValueRef
-    code: str
+    code: _Source
+    source: Any
     cookie: int
     directory: URL
     fullpath: str
     parent: Optional[JSModuleRecord]
     _as_parameter_: JSModuleRecord
 
-    def __init__(self, specifier: URL, code: str,
+    def __init__(self, specifier: URL, code: _Source,
                  importer: Optional[JSModuleRecord] = None) -> None:
+        """
+        `code` is module's final source, see `ModuleRuntime.fetch`,
+        bytes and memory maps are UTF-8
+        """
         self.cookie = cookies.increment()
         self.directory = parse_url(".", base=str(specifier))
         self.fullpath = specifier.href
@@ -68,12 +84,19 @@ class JSModule:
         module = init_module_record(importer, self.spec)
         add_ref(module)
         self._as_parameter_ = module
-        self.code = dafault_transformer(code, specifier)
+        self.code = code
+        self.source = None
         set_url(module, self.spec)
 
     def parse(self):
-        script = str_to_array(self.code, encoding="UTF-16")
-        parse_module_source(self, self.cookie, script)
+        code = self.code
+        if type(code) is str:
+            code = code.encode("utf-8")
+        # The view is kept alive with the module, so a mapped file
+        # stays mapped for as long as the engine may read it
+        self.source = buffer_view(code)
+        # JsParseModuleSourceFlags_DataIsUTF8
+        parse_module_source(self, self.cookie, self.source, 1)
         if self.root:
             module_queue.exec()
 
@@ -86,6 +109,8 @@ class JSModule:
         js_release(self)
         self.spec = None
         self._as_parameter_ = None
+        self.source = None
+        self.code = None
 
 
 def default_path_resolver(base: str, spec: str) -> URL:
@@ -96,19 +121,49 @@ def default_path_resolver(base: str, spec: str) -> URL:
     raise SyntaxError(f"Cannot resolve path {spec}")
 
 
+def _file_path(url: URL) -> str:
+    href = url.href[5:]
+    while href[0] == "/":
+        href = href[1:]
+    if name == "posix":
+        href = "/" + href
+    return href
+
+
+def map_source(path: str) -> Union[bytes, mmap]:
+    """
+    Reads a UTF-8 source file without decoding it,
+    files from `_MAP_THRESHOLD` bytes are memory-mapped instead.
+    Note that Windows doesn't allow replacing a file while it is mapped
+    """
+    with open(path, "rb") as file:
+        if fstat(file.fileno()).st_size < _MAP_THRESHOLD:
+            return file.read()
+        # Copy-on-write, ctypes can only point into writable buffers
+        return mmap(file.fileno(), 0, access=ACCESS_COPY)
+
+
+def load_source(url: URL) -> Union[bytes, mmap]:
+    """
+    Loads script or module source as UTF-8,
+    local files go through `map_source`
+    """
+    if url.scheme == "file":
+        return map_source(_file_path(url))
+    return default_loader(url).encode("utf-8")
+
+
+# Pooled connections without the disk cache,
+# use `HTTPLoader` as `loader` to get one
+_http_loader = HTTPLoader(None)
+
+
 def default_loader(url: URL):
     scheme = url.scheme
     if scheme == "https" or scheme == "http":
-        response = requests.get(url.href)
-        response.raise_for_status()
-        return response.text
+        return _http_loader.fetch(url.href)
     elif scheme == "file":
-        href = url.href[5:]
-        while href[0] == "/":
-            href = href[1:]
-        if name == "posix":
-            href = "/" + href
-        with open(href, 'r') as file:
+        with open(_file_path(url), 'r') as file:
             return file.read()
     else:
         raise TypeError(f"Path scheme \"{scheme}\" is not supported")
@@ -116,26 +171,51 @@ def default_loader(url: URL):
 
 class _ModuleEmitter:
     @classmethod
-    def emit(cls, structure: _Emittable) -> str:
-        emitted = cls._emit(structure)
+    def emit(cls, structure: _Emittable,
+             source: Optional[str] = None) -> str:
+        """
+        Emits the data as `JSON.parse` of a string literal, which engine
+        handles much faster than an equivalent object literal.
+        `source` is JSON text of the structure, if it is already at hand.
+        Data not representable as JSON (NaN, Infinity) is emitted as literal
+        """
+        try:
+            emitted = cls._emit_json(structure, source)
+        except (TypeError, ValueError):
+            emitted = cls._emit(structure)
+        return cls._emit_module(structure, emitted)
+
+    @classmethod
+    def emit_literal(cls, structure: _Emittable) -> str:
+        return cls._emit_module(structure, cls._emit(structure))
+
+    @staticmethod
+    def _emit_module(structure: _Emittable, emitted: str) -> str:
         if type(structure) is dict:
             structure: Dict[str, _Emittable]
             regex = re.compile(r"^[_\$\p{ID_START}]\p{ID_CONTINUE}*$", re.M)
             keys = [k for k in structure.keys()
-                    if re.search(regex, k) and k not in _KEYWORDS]
+                    if _is_binding_name(k, regex)]
             name = _gen_random_name()
             while name in keys:
                 # avoid situiations where random name
                 # is a property name of parsed file
                 name = _gen_random_name()
-            code = f"const {name} = {emitted};\n\n"
-            for k in keys:
-                code += f"export const {k} = {name}.{k};\n"
-            code += f"export default {name};\n"
-            return code
+            code = [f"const {name} = {emitted};\n\n"]
+            code.extend(f"export const {k} = {name}.{k};\n" for k in keys)
+            code.append(f"export default {name};\n")
+            return "".join(code)
         else:
             return f"export default {emitted};\n"
 
+    @staticmethod
+    def _emit_json(structure: _Emittable, source: Optional[str]) -> str:
+        if source is None:
+            source = dumps(structure, allow_nan=False, ensure_ascii=False,
+                           separators=(",", ":"))
+        # ASCII-only literal, so U+2028 and U+2029 are escaped too
+        return f"JSON.parse({dumps(source)})"
+
     @classmethod
     def _emit(cls, value: _Emittable) -> str:
         if type(value) is dict:
@@ -156,15 +236,13 @@ class _ModuleEmitter:
     @staticmethod
     def _emit_simple(value: _EmittableSimple) -> str:
         if type(value) is str:
-            return "\"" + value \
-                .replace("\\", "\\\\") \
-                .replace("\n", "\\n") \
-                .replace("\r", "\\r") \
-                .replace("\"", "\\\"") + "\""
+            # Escapes quotes, backslashes, all control characters
+            # and line terminators
+            return dumps(value)
         if type(value) is int:
             return str(value)
         if type(value) is float:
-            if value == float("nan"):
+            if value != value:
                 return "NaN"
             if value == float("inf"):
                 return "Infinity"
@@ -180,13 +258,25 @@ class _ModuleEmitter:
         raise TypeError
 
 
+def _reject_constant(constant: str) -> None:
+    raise ValueError(f"{constant} is not supported by JSON.parse")
+
+
+def _extension(url: URL) -> Optional[str]:
+    match = re.match(_EXTENSION_REGEX, url.path)
+    return match and match.groups()[0]
+
+
 def dafault_transformer(code: str, url: URL):
-    regex = re.compile(r"""^(?:/[^/]+)+(\.[^\.]+)+$""", re.M | re.U)
-    extension = re.match(regex, url.path).groups()[0]
+    extension = _extension(url)
     if extension in (".yml", ".yaml"):
         return _ModuleEmitter.emit(safe_load(code))
     elif extension == ".json":
-        return _ModuleEmitter.emit(decoder.decode(code))
+        try:
+            # The file is valid JSON.parse input as is
+            return _ModuleEmitter.emit(strict_decoder.decode(code), code)
+        except ValueError:
+            return _ModuleEmitter.emit(decoder.decode(code))
     elif extension == ".toml":
         return _ModuleEmitter.emit(loads(code))
     elif extension == ".csv":
@@ -210,6 +300,163 @@ def default_import_meta_callback(module: JSModule, object: JSValueRef):
     set_property(object, "url", module.spec)
 
 
+def _digest(data: bytes) -> str:
+    return sha256(data).hexdigest()
+
+
+class ModuleCache(DiskCache):
+    """
+    Content-addressed on-disk cache of transformed data modules
+    (JSON, YAML, TOML, CSV and XML), shared between processes.
+    Files with unchanged path, mtime and size are served without being read,
+    changed files with already seen content - without being parsed
+    """
+    __slots__ = ()
+
+    def __init__(self, directory: Optional[str] = None, *,
+                 max_size: int = 64 * 1024 * 1024,
+                 enabled: bool = True) -> None:
+        super().__init__(directory or default_cache_directory("modules"),
+                         max_size=max_size, enabled=enabled)
+
+    def transform(self, url: URL, load: Callable[[], str]) -> str:
+        path = _file_path(url)
+        info = stat(path)
+        stat_key = "s" + _digest(f"{EMITTER_VERSION}\0{path}\0"
+                                 f"{info.st_mtime_ns}\0{info.st_size}"
+                                 .encode())
+        content_key = self.read(stat_key)
+        if content_key is not None:
+            code = self.read(content_key.decode())
+            if code is not None:
+                return code.decode("utf8")
+        source = load()
+        content_key = _digest(f"{EMITTER_VERSION}\0{_extension(url)}\0"
+                              .encode() + source.encode("utf8"))
+        code = self.read(content_key)
+        if code is None:
+            code = dafault_transformer(source, url).encode("utf8")
+            self.write(content_key, code)
+        self.write(stat_key, content_key.encode())
+        return code.decode("utf8")
+
+
+class ModuleGraph:
+    """
+    Loaded modules indexed by specifier and by module record pointer,
+    along with importer -> importee edges between them
+    """
+    __slots__ = "__by_spec", "__by_pointer", "__importees", "__importers", \
+        "__versions"
+    __by_spec: Dict[str, JSModule]
+    __by_pointer: Dict[int, JSModule]
+    __importees: Dict[str, Set[str]]
+    __importers: Dict[str, Set[str]]
+    __versions: Dict[str, Optional[Tuple[int, int]]]
+
+    def __init__(self) -> None:
+        self.__by_spec = dict()
+        self.__by_pointer = dict()
+        self.__importees = dict()
+        self.__importers = dict()
+        self.__versions = dict()
+
+    def add(self, spec: str, module: JSModule) -> None:
+        self.__by_spec[spec] = module
+        self.__by_pointer[module._as_parameter_.value] = module
+        self.__importees.setdefault(spec, set())
+        self.__importers.setdefault(spec, set())
+        self.__versions[spec] = _file_version(module.fullpath)
+
+    def add_edge(self, importer: str, importee: str) -> None:
+        self.__importees[importer].add(importee)
+        self.__importers[importee].add(importer)
+
+    def get(self, spec: str) -> Optional[JSModule]:
+        return self.__by_spec.get(spec)
+
+    def get_by_pointer(self, pointer: Optional[int]) -> Optional[JSModule]:
+        return self.__by_pointer.get(pointer)
+
+    def importees(self, spec: str) -> Set[str]:
+        return set(self.__importees.get(spec, ()))
+
+    def importers(self, spec: str) -> Set[str]:
+        return set(self.__importers.get(spec, ()))
+
+    def dependents(self, specs: Iterable[str]) -> Set[str]:
+        """
+        Returns `specs` with all their direct and transitive importers
+        """
+        result = set()
+        pending = list(specs)
+        while pending:
+            spec = pending.pop()
+            if spec not in result:
+                result.add(spec)
+                pending.extend(self.__importers.get(spec, ()))
+        return result
+
+    def changed(self) -> List[str]:
+        """
+        Returns specifiers of local modules changed on disk since loading
+        """
+        result = []
+        for spec, version in self.__versions.items():
+            if version is None:
+                continue
+            if _file_version(self.__by_spec[spec].fullpath) != version:
+                result.append(spec)
+        return result
+
+    def remove(self, spec: str) -> Optional[JSModule]:
+        module = self.__by_spec.pop(spec, None)
+        if module is None:
+            return None
+        del self.__by_pointer[module._as_parameter_.value]
+        del self.__versions[spec]
+        for importee in self.__importees.pop(spec):
+            self.__importers[importee].discard(spec)
+        for importer in self.__importers.pop(spec):
+            self.__importees[importer].discard(spec)
+        return module
+
+    def values(self) -> Iterable[JSModule]:
+        return self.__by_spec.values()
+
+    def copy(self) -> ModuleGraph:
+        graph = ModuleGraph()
+        graph.__by_spec = dict(self.__by_spec)
+        graph.__by_pointer = dict(self.__by_pointer)
+        graph.__importees = {k: set(v) for k, v in self.__importees.items()}
+        graph.__importers = {k: set(v) for k, v in self.__importers.items()}
+        graph.__versions = dict(self.__versions)
+        return graph
+
+    def clear(self) -> None:
+        self.__by_spec.clear()
+        self.__by_pointer.clear()
+        self.__importees.clear()
+        self.__importers.clear()
+        self.__versions.clear()
+
+    def __contains__(self, spec: str) -> bool:
+        return spec in self.__by_spec
+
+    def __len__(self) -> int:
+        return len(self.__by_spec)
+
+
+def _file_version(url: str) -> Optional[Tuple[int, int]]:
+    if not url.startswith("file:"):
+        return None
+    try:
+        info = stat(_file_path(parse_url(url)))
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
 class ModuleFIFOQueue(FIFOQueue[JSModule]):
     def run(_, module: JSModule):
         module.parse()
@@ -217,34 +464,174 @@ class ModuleFIFOQueue(FIFOQueue[JSModule]):
 
 class ModuleRuntime:
     # TODO: Properly handle errors
-    __slots__ = "modules", "path_resolver", "loader", "runtime", "queue"
-    modules: Dict[str, JSModule]
+    __slots__ = "modules", "path_resolver", "loader", "runtime", "queue", \
+        "cache", "prefetch_workers", "prefetched", "map_sources"
+    modules: ModuleGraph
     path_resolver: PathResolverFunctionType
     loader: LoaderFunctionType
+    cache: Optional[ModuleCache]
+    prefetch_workers: int
+    prefetched: Dict[str, _Source]
+    map_sources: bool
 
     def __init__(self, runtime: Any,
                  path_resolver: Optional[PathResolverFunctionType] =
                  _skip_args(default_path_resolver, 1),
-                 loader: Optional[LoaderFunctionType] =
-                 _skip_args(default_loader, 1)) -> None:
-        self.modules = dict()
+                 loader: Optional[LoaderFunctionType] = None,
+                 cache: Optional[ModuleCache] = None,
+                 prefetch_workers: int = 0) -> None:
+        self.modules = ModuleGraph()
         self.path_resolver = partial(path_resolver, default_path_resolver)
-        self.loader = partial(loader, default_loader)
+        self.loader = partial(loader or _skip_args(default_loader, 1),
+                              default_loader)
+        # Custom loaders may rewrite sources, so only the default one
+        # is bypassed for local JS modules
+        self.map_sources = loader is None
         self.runtime = runtime
+        self.cache = cache
+        self.prefetch_workers = prefetch_workers
+        self.prefetched = dict()
         module_queue.clear()
 
+    def fetch(self, spec: URL) -> _Source:
+        """
+        Loads and transforms module's source,
+        data modules from the disk go through `cache`,
+        local JS modules are read as UTF-8 by `map_source`.
+        Modules loaded by `prefetch` are served from memory
+        """
+        code = self.prefetched.pop(str(spec), None)
+        if code is not None:
+            return code
+        if spec.scheme == "file":
+            data = _extension(spec) in _DATA_EXTENSIONS
+            if not data and self.map_sources:
+                return map_source(_file_path(spec))
+            cache = self.cache
+            if data and cache is not None and cache.enabled:
+                return cache.transform(spec,
+                                       lambda: str(self.loader(spec)))
+        return dafault_transformer(str(self.loader(spec)), spec)
+
     def add_module(self, spec: str, module: JSModule) -> None:
-        self.modules[spec] = module
+        self.modules.add(spec, module)
 
     def get_module(self, specifier: str) -> Optional[JSModule]:
-        return self.modules.get(specifier)
+        return self.modules.get(str(specifier))
 
     def get_module_by_pointer(self, ref: JSModuleRecord) -> Optional[JSModule]:
         if ref is None:
             return None
-        for module in self.modules.values():
-            if module._as_parameter_.value == ref.value:
-                return module
+        return self.modules.get_by_pointer(ref.value)
+
+    def prefetch(self, spec: URL) -> None:
+        """
+        Statically scans import specifiers starting from `spec` and loads
+        the whole module graph concurrently before the engine asks
+        for each module. Modules which fail to load here are left
+        for the engine to fetch, so errors are reported as usual
+        """
+        prefetched = self.prefetched
+        seen = {str(spec)}
+        with ThreadPoolExecutor(self.prefetch_workers) as executor:
+            pending = {executor.submit(self.fetch, spec): spec}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = pending.pop(future)
+                    if future.exception() is not None:
+                        continue
+                    code = prefetched[str(url)] = future.result()
+                    if _extension(url) in _DATA_EXTENSIONS:
+                        continue
+                    base = parse_url(".", base=str(url))
+                    regex = _IMPORT_REGEX if type(code) is str \
+                        else _IMPORT_REGEX_BYTES
+                    for match in regex.finditer(code):
+                        specifier = match[2]
+                        if type(specifier) is bytes:
+                            specifier = specifier.decode("utf-8", "replace")
+                        try:
+                            child = self.path_resolver(base, specifier)
+                        except Exception:
+                            continue
+                        if str(child) in seen or str(child) in self.modules:
+                            continue
+                        seen.add(str(child))
+                        pending[executor.submit(self.fetch, child)] = child
+
+    def exec_root(self, spec: URL) -> JSModule:
+        if self.prefetch_workers:
+            self.prefetch(spec)
+        try:
+            module = JSModule(spec, self.fetch(spec))
+            self.add_module(str(spec), module)
+            module.parse()
+        finally:
+            # Static imports are resolved by now,
+            # whatever is left are false positives of the scan
+            self.prefetched.clear()
+        return module
+
+    def reload(self, specs: Iterable[str]) -> Set[str]:
+        """
+        Re-fetches, re-parses and re-evaluates modules `specs`
+        and everything that imports them, other modules stay loaded.
+        If any of them fails to load, the old modules keep running.
+        Returns specifiers of all reloaded modules
+        """
+        affected = self.modules.dependents(specs)
+        # A file caught mid-save fails here, before anything is torn down
+        sources = {spec: self.fetch(parse_url(spec))
+                   for spec in affected if spec in self.modules}
+        previous = self.modules.copy()
+        old = []
+        roots = []
+        for spec in affected:
+            module = self.modules.remove(spec)
+            if module is None:
+                continue
+            if module.root:
+                roots.append(module.fullpath)
+            old.append(module)
+        try:
+            for root in roots:
+                # `exec_root` drops whatever it didn't use
+                self.prefetched.update(
+                    (spec, code) for spec, code in sources.items()
+                    if spec not in self.modules)
+                self.exec_root(parse_url(root))
+        except BaseException:
+            module_queue.clear()
+            for module in self.modules.values():
+                if previous.get(module.fullpath) is not module:
+                    module.dispose()
+            self.modules = previous
+            raise
+        finally:
+            self.prefetched.clear()
+        for module in old:
+            module.dispose()
+        return affected
+
+    def reload_changed(self) -> Set[str]:
+        """
+        Reloads modules changed on disk, see `reload`
+        """
+        changed = self.modules.changed()
+        return self.reload(changed) if changed else set()
+
+    async def watch(self, interval: float = 1.0) -> None:
+        """
+        Polls loaded modules for changes and reloads them until cancelled
+        """
+        while True:
+            await sleep(interval)
+            try:
+                self.reload_changed()
+            except Exception as e:
+                # Retried on the next tick, the file may be mid-save
+                print("Failed to reload modules, error:", e)
 
     def on_module_fetch(self, importer: Optional[JSModuleRecord],
                         specifier: JSValueRef,
@@ -261,10 +648,11 @@ class ModuleRuntime:
             raise TypeError
         module = self.get_module(spec)
         if module is None:
-            code = str(self.loader(spec))
-            module = JSModule(spec, code, parent_module)
+            module = JSModule(spec, self.fetch(spec), parent_module)
             self.add_module(str(spec), module)
             module_queue.append(module)
+        if parent_module is not None:
+            self.modules.add_edge(parent_module.fullpath, str(spec))
         module_record_p[0] = module._as_parameter_.value
 
     def on_module_ready(self, module: JSModule,
@@ -317,5 +705,17 @@ _EmittableSimple = Union[str, int, float, bool, None]
 _Emittable = Union[List['_Emittable'],
                    Dict[str, '_Emittable'],
                    _EmittableSimple]
+_Source = Union[str, bytes, mmap]
 _T = TypeVar("_T")
 decoder = JSONDecoder()
+_EXTENSION_REGEX = re.compile(r"""^(?:/[^/]+)+(\.[^\.]+)+$""", re.M | re.U)
+_DATA_EXTENSIONS = ".yml", ".yaml", ".json", ".toml", ".csv", ".xml"
+# Matches `import "x"`, `import ... from "x"`, `export ... from "x"`
+# and `import("x")`, it is fine if it catches a bit more than that
+_IMPORT_REGEX = re.compile(r"""\b(?:from|import)\s*\(?\s*(["'])([^"'\n]+)\1""")
+_IMPORT_REGEX_BYTES = re.compile(_IMPORT_REGEX.pattern.encode())
+# Smaller sources are cheaper to read than to map
+_MAP_THRESHOLD = 64 * 1024
+# Bump when emitted code changes, so cached modules get invalidated
+EMITTER_VERSION = "2"
+strict_decoder = JSONDecoder(parse_constant=_reject_constant)
@@ -2,5 +2,7 @@ from .cookies import *
 from .fifo_queue import *
 from .init import *
 from .base_value import *
+from .disk_cache import *
 
-__all__ = "FIFOQueue", "cookies", "chakra_core", "BaseValue"
+__all__ = "FIFOQueue", "cookies", "chakra_core", "library_path", "backend", \
+    "BaseValue", "DiskCache", "default_cache_directory"
@@ -34,3 +34,6 @@ class BaseValue:
 
     def is_typed_array(self):
         return False
+
+    def is_data_view(self):
+        return False
@@ -0,0 +1,94 @@
+"""
+cffi flavour of the native layer.
+Declarations are generated from `PROTOTYPES`, so both backends always
+agree on the function surface. Handles are declared as `uintptr_t`,
+which lets Python ints cross the boundary without `ffi.cast` calls.
+API mode is used when the extension built by `cffi_build.py` is importable,
+otherwise ChakraCore is opened in ABI mode.
+"""
+from ctypes import POINTER, c_bool, c_char_p, c_double, c_int, c_size_t, \
+    c_uint, c_ushort, c_void_p
+from typing import Iterator, Tuple
+
+from cffi import FFI
+
+from .prototypes import PROTOTYPES
+
+__all__ = "ffi", "lib", "mode", "functions"
+
+_C_TYPES = {
+    c_void_p: "uintptr_t",
+    c_char_p: "char *",
+    c_bool: "bool",
+    c_int: "int",
+    c_uint: "unsigned int",
+    c_ushort: "unsigned short",
+    c_size_t: "size_t",
+    c_double: "double",
+}
+API_PREFIX = "py_"
+
+
+def _c_type(ctype: type) -> str:
+    if ctype in _C_TYPES:
+        return _C_TYPES[ctype]
+    for pointee, name in _C_TYPES.items():
+        if ctype is POINTER(pointee):
+            return name + " *"
+    raise TypeError(f"No C declaration for {ctype!r}")
+
+
+def _declarations(prefix: str) -> Iterator[Tuple[str, str, Tuple[str, ...]]]:
+    for name, argtypes in PROTOTYPES.items():
+        yield name, prefix + name, tuple(map(_c_type, argtypes))
+
+
+def cdef(prefix: str = "") -> str:
+    return "\n".join(
+        f"unsigned int {exported}({', '.join(params)});"
+        for _, exported, params in _declarations(prefix))
+
+
+def c_source() -> str:
+    """
+    Thin static shims casting `uintptr_t` handles back to ChakraCore types,
+    compiled by `cffi_build.py` for API mode
+    """
+    shims = ['#include "ChakraCore.h"']
+    for name, exported, params in _declarations(API_PREFIX):
+        args = ", ".join(
+            f"(void *)a{index}" if param == "uintptr_t" or "*" in param
+            else f"a{index}" for index, param in enumerate(params))
+        signature = ", ".join(f"{param} a{index}"
+                              for index, param in enumerate(params))
+        shims.append(f"static unsigned int {exported}({signature}) "
+                     f"{{ return {name}({args}); }}")
+    return "\n".join(shims)
+
+
+def _load():
+    try:
+        from ._chakra_cffi import ffi, lib
+    except ImportError:
+        from .init import library_path
+        ffi = FFI()
+        ffi.cdef(cdef())
+        return ffi, ffi.dlopen(library_path), "abi", ""
+    return ffi, lib, "api", API_PREFIX
+
+
+class _Functions:
+    """
+    Maps plain JSRT names to the functions exported by the loaded module
+    """
+
+    def __init__(self, lib, prefix: str) -> None:
+        for name in PROTOTYPES:
+            try:
+                setattr(self, name, getattr(lib, prefix + name))
+            except AttributeError:
+                continue
+
+
+ffi, lib, mode, _prefix = _load()
+functions = _Functions(lib, _prefix)
@@ -0,0 +1,24 @@
+"""
+Builds the API mode cffi extension used by `cffi_backend`.
+CHAKRACORE_INCLUDE and CHAKRACORE_LIB environment variables should point
+to ChakraCore headers and library directories respectively:
+python -m python_chakra.utils.cffi_build
+"""
+from os import environ
+from os.path import dirname
+
+from cffi import FFI
+
+from .cffi_backend import API_PREFIX, c_source, cdef
+
+
+ffibuilder = FFI()
+ffibuilder.cdef(cdef(API_PREFIX))
+ffibuilder.set_source("python_chakra.utils._chakra_cffi", c_source(),
+                      include_dirs=[environ.get("CHAKRACORE_INCLUDE", ".")],
+                      library_dirs=[environ.get("CHAKRACORE_LIB",
+                                                f"{dirname(__file__)}/libs")],
+                      libraries=["ChakraCore"])
+
+if __name__ == "__main__":
+    ffibuilder.compile(tmpdir=f"{dirname(__file__)}/../..", verbose=True)
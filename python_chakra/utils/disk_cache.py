@@ -0,0 +1,105 @@
+from os import environ, makedirs, remove, replace, scandir, utime
+from os.path import expanduser, join
+from tempfile import mkstemp
+from typing import Optional
+
+
+__all__ = "DiskCache", "default_cache_directory"
+
+
+def default_cache_directory(name: str) -> str:
+    root = environ.get("PYTHON_CHAKRA_CACHE_DIR",
+                       join(expanduser("~"), ".cache", "python_chakra"))
+    return join(root, name)
+
+
+class DiskCache:
+    """
+    A directory of cache entries shared between processes.
+    Writes are atomic, least recently used entries are evicted
+    once `max_size` bytes is exceeded
+    """
+    __slots__ = "directory", "max_size", "enabled"
+    directory: str
+    max_size: int
+    enabled: bool
+
+    def __init__(self, directory: str, *, max_size: int,
+                 enabled: bool = True) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.enabled = enabled
+        makedirs(directory, exist_ok=True)
+
+    def read(self, name: str) -> Optional[bytes]:
+        path = join(self.directory, name)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            # Bump mtime, it is used as the last access time on eviction
+            utime(path)
+        except OSError:
+            return None
+        return data
+
+    def write(self, name: str, data: bytes) -> None:
+        path = join(self.directory, name)
+        try:
+            # Unique per call, so threads and processes writing
+            # the same entry don't share a temporary file
+            descriptor, temporary = mkstemp(".tmp", f"{name}.",
+                                            self.directory)
+        except OSError:
+            return
+        try:
+            with open(descriptor, "wb") as file:
+                file.write(data)
+            # Atomic, so concurrent writers never expose partial entries
+            replace(temporary, path)
+        except OSError:
+            try:
+                remove(temporary)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def delete(self, name: str) -> None:
+        try:
+            remove(join(self.directory, name))
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        # The directory is shared, other processes and threads
+        # may evict the same entries concurrently
+        entries = []
+        for entry in scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                if entry.is_file():
+                    info = entry.stat()
+                    entries.append((info.st_mtime_ns, info.st_size,
+                                    entry.path))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        for entry in scandir(self.directory):
+            try:
+                remove(entry.path)
+            except OSError:
+                pass
@@ -1,9 +1,26 @@
 from ctypes import CDLL
-from os import name
+from os import environ, name
 from os.path import dirname
 
-__all__ = 'chakra_core',
+from .prototypes import ChakraCoreBindings
+
+__all__ = 'chakra_core', 'library_path', 'backend'
 if name == "nt":
-    chakra_core = CDLL(f"{dirname(__file__)}/libs/ChakraCore.dll")
+    library_path = f"{dirname(__file__)}/libs/ChakraCore.dll"
 elif name == "posix":
-    chakra_core = CDLL(f"{dirname(__file__)}/libs/libChakraCore.dylib")
+    library_path = f"{dirname(__file__)}/libs/libChakraCore.dylib"
+chakra_core = ChakraCoreBindings(CDLL(library_path))
+# Native callbacks are always created with ctypes, PYTHON_CHAKRA_BACKEND
+# only selects how the hot calls from `cffi_wrapper` are made
+backend = environ.get("PYTHON_CHAKRA_BACKEND", "auto")
+if backend not in ("auto", "cffi", "ctypes"):
+    raise ValueError(f"Unknown PYTHON_CHAKRA_BACKEND value {backend!r}")
+if backend != "ctypes":
+    try:
+        from . import cffi_backend  # noqa: F401
+    except ImportError:
+        if backend == "cffi":
+            raise
+        backend = "ctypes"
+    else:
+        backend = "cffi"
@@ -0,0 +1,141 @@
+"""
+Declarative prototypes of the ChakraCore entry points used by the wrapper.
+Every function is bound once with full `argtypes` / `restype`,
+so ctypes doesn't have to guess argument conversions on each call
+and pointers are never truncated to `int` on 64-bit platforms.
+"""
+from ctypes import CDLL, POINTER, c_bool, c_char_p, c_double, c_int, \
+    c_size_t, c_uint, c_ushort, c_void_p
+from typing import Dict, Tuple
+
+__all__ = "ChakraCoreBindings", "PROTOTYPES", "JsErrorCode"
+
+JsErrorCode = c_uint
+JsRef = c_void_p
+JsValueRef = c_void_p
+JsPropertyIdRef = c_void_p
+JsRuntimeHandle = c_void_p
+JsContextRef = c_void_p
+JsModuleRecord = c_void_p
+JsSourceContext = c_size_t
+# Callbacks are passed as plain code pointers,
+# the wrapper creates them with `CFUNCTYPE`
+JsCallback = c_void_p
+JsValueRefPtr = POINTER(JsValueRef)
+
+PROTOTYPES: Dict[str, Tuple[type, ...]] = {
+    # Runtime and context
+    "JsCreateRuntime": (c_int, c_void_p, POINTER(JsRuntimeHandle)),
+    "JsDisposeRuntime": (JsRuntimeHandle,),
+    "JsCreateContext": (JsRuntimeHandle, POINTER(JsContextRef)),
+    "JsSetCurrentContext": (JsContextRef,),
+    "JsGetRuntimeMemoryLimit": (JsRuntimeHandle, POINTER(c_size_t)),
+    "JsSetRuntimeMemoryLimit": (JsRuntimeHandle, c_size_t),
+    "JsGetRuntimeMemoryUsage": (JsRuntimeHandle, POINTER(c_size_t)),
+    "JsCollectGarbage": (JsRuntimeHandle,),
+    "JsAddRef": (JsRef, POINTER(c_uint)),
+    "JsRelease": (JsRef, POINTER(c_uint)),
+    "JsSetObjectBeforeCollectCallback": (JsRef, c_void_p, JsCallback),
+    # Well-known values
+    "JsGetGlobalObject": (JsValueRefPtr,),
+    "JsGetUndefinedValue": (JsValueRefPtr,),
+    "JsGetNullValue": (JsValueRefPtr,),
+    "JsGetTrueValue": (JsValueRefPtr,),
+    "JsGetFalseValue": (JsValueRefPtr,),
+    # Value creation and conversion
+    "JsCreateObject": (JsValueRefPtr,),
+    "JsCreateArray": (c_uint, JsValueRefPtr),
+    "JsCreateString": (c_char_p, c_size_t, JsValueRefPtr),
+    "JsCopyString": (JsValueRef, c_void_p, c_size_t, POINTER(c_size_t)),
+    "JsCreateStringUtf16": (c_void_p, c_size_t, JsValueRefPtr),
+    "JsCopyStringUtf16": (JsValueRef, c_int, c_int, c_void_p,
+                          POINTER(c_size_t)),
+    "JsGetStringLength": (JsValueRef, POINTER(c_int)),
+    "JsCreateError": (JsValueRef, JsValueRefPtr),
+    "JsCreateTypeError": (JsValueRef, JsValueRefPtr),
+    "JsCreateArrayBuffer": (c_uint, JsValueRefPtr),
+    "JsCreateExternalArrayBuffer": (c_void_p, c_uint, JsCallback, c_void_p,
+                                    JsValueRefPtr),
+    "JsCreateTypedArray": (c_int, JsValueRef, c_uint, c_uint, JsValueRefPtr),
+    "JsCreatePromise": (JsValueRefPtr, JsValueRefPtr, JsValueRefPtr),
+    "JsGetPromiseResult": (JsValueRef, JsValueRefPtr),
+    "JsGetPromiseState": (JsValueRef, POINTER(c_int)),
+    "JsDoubleToNumber": (c_double, JsValueRefPtr),
+    "JsNumberToDouble": (JsValueRef, POINTER(c_double)),
+    "JsNumberToInt": (JsValueRef, POINTER(c_int)),
+    "JsConvertValueToNumber": (JsValueRef, JsValueRefPtr),
+    "JsConvertValueToObject": (JsValueRef, JsValueRefPtr),
+    "JsConvertValueToString": (JsValueRef, JsValueRefPtr),
+    "JsGetValueType": (JsValueRef, POINTER(c_int)),
+    "JsCloneObject": (JsValueRef, JsValueRefPtr),
+    # Properties and prototypes
+    "JsCreatePropertyId": (c_char_p, c_size_t, POINTER(JsPropertyIdRef)),
+    "JsGetProperty": (JsValueRef, JsPropertyIdRef, JsValueRefPtr),
+    "JsSetProperty": (JsValueRef, JsPropertyIdRef, JsValueRef, c_bool),
+    "JsGetIndexedProperty": (JsValueRef, JsValueRef, JsValueRefPtr),
+    "JsSetIndexedProperty": (JsValueRef, JsValueRef, JsValueRef),
+    "JsGetOwnPropertyNames": (JsValueRef, JsValueRefPtr),
+    "JsGetPrototype": (JsValueRef, JsValueRefPtr),
+    "JsSetPrototype": (JsValueRef, JsValueRef),
+    # Functions
+    "JsCreateFunction": (JsCallback, c_void_p, JsValueRefPtr),
+    "JsCreateNamedFunction": (JsValueRef, JsCallback, c_void_p,
+                              JsValueRefPtr),
+    "JsCallFunction": (JsValueRef, JsValueRefPtr, c_ushort, JsValueRefPtr),
+    "JsConstructObject": (JsValueRef, JsValueRefPtr, c_ushort,
+                          JsValueRefPtr),
+    "JsIsCallable": (JsValueRef, POINTER(c_bool)),
+    "JsIsConstructor": (JsValueRef, POINTER(c_bool)),
+    # Exceptions
+    "JsSetException": (JsValueRef,),
+    "JsGetAndClearException": (JsValueRefPtr,),
+    # Scripts, modules and promises
+    "JsRun": (JsValueRef, JsSourceContext, JsValueRef, c_int, JsValueRefPtr),
+    "JsParse": (JsValueRef, JsSourceContext, JsValueRef, c_int,
+                JsValueRefPtr),
+    "JsSerialize": (JsValueRef, JsValueRefPtr, c_int),
+    "JsRunSerialized": (JsValueRef, JsCallback, JsSourceContext, JsValueRef,
+                        JsValueRefPtr),
+    "JsGetArrayBufferStorage": (JsValueRef, POINTER(c_void_p),
+                                POINTER(c_uint)),
+    "JsGetTypedArrayStorage": (JsValueRef, POINTER(c_void_p),
+                               POINTER(c_uint), POINTER(c_int),
+                               POINTER(c_int)),
+    "JsGetTypedArrayInfo": (JsValueRef, POINTER(c_int), JsValueRefPtr,
+                            POINTER(c_uint), POINTER(c_uint)),
+    "JsCreateDataView": (JsValueRef, c_uint, c_uint, JsValueRefPtr),
+    "JsGetDataViewStorage": (JsValueRef, POINTER(c_void_p),
+                             POINTER(c_uint)),
+    "JsInitializeModuleRecord": (JsModuleRecord, JsValueRef,
+                                 POINTER(JsModuleRecord)),
+    "JsParseModuleSource": (JsModuleRecord, JsSourceContext, c_void_p,
+                            c_uint, c_int, JsValueRefPtr),
+    "JsModuleEvaluation": (JsModuleRecord, JsValueRefPtr),
+    "JsSetModuleHostInfo": (JsModuleRecord, c_int, c_void_p),
+    "JsSetPromiseContinuationCallback": (JsCallback, c_void_p),
+    "JsSetHostPromiseRejectionTracker": (JsCallback, c_void_p),
+}
+
+
+class ChakraCoreBindings:
+    """
+    Typed function pointers of ChakraCore, bound once from `PROTOTYPES`
+    """
+
+    def __init__(self, library: CDLL) -> None:
+        self._library = library
+        self._FuncPtr = library._FuncPtr
+        for name, argtypes in PROTOTYPES.items():
+            try:
+                function = library[name]
+            except AttributeError:
+                # Not exported by this build of ChakraCore,
+                # calling it will raise AttributeError
+                continue
+            function.argtypes = argtypes
+            function.restype = JsErrorCode
+            setattr(self, name, function)
+
+    def __getattr__(self, name: str):
+        raise AttributeError(f"ChakraCore entry point {name} is either "
+                             "not exported or has no prototype declared")
@@ -34,4 +34,5 @@ setup(name='python-chakra',
       description='Python wrapper for ChakraCore',
       include_package_data=True,
       install_requires=requirements,
+      extras_require={"numpy": ["numpy"]},
       python_requires='>=3.7.0')
@@ -0,0 +1,59 @@
+"""
+Tests import the package through the `chakra` fixture, they are skipped
+when the ChakraCore library isn't in `python_chakra/utils/libs`.
+Any other error raised while importing fails them.
+Pure python modules are tested through `standalone` on any machine.
+Soak tests run only with `--soak`
+"""
+from importlib import import_module
+from pathlib import Path
+from sys import modules
+from types import ModuleType
+
+import pytest
+
+PACKAGE = Path(__file__).parent.parent / "python_chakra"
+
+
+def pytest_addoption(parser):
+    parser.addoption("--soak", action="store_true",
+                     help="run slow soak tests")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "soak: slow soak test")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--soak"):
+        return
+    skip = pytest.mark.skip(reason="soak test, run with --soak")
+    for item in items:
+        if "soak" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def chakra():
+    try:
+        return import_module("python_chakra")
+    except OSError as e:
+        pytest.skip(f"ChakraCore library is not available: {e}")
+
+
+@pytest.fixture(scope="session")
+def standalone():
+    """
+    `http_loader` (and `DiskCache` through it) imported from a private
+    package, the real one loads the ChakraCore library on import
+    """
+    name = "_python_chakra_standalone"
+    if name not in modules:
+        package = modules[name] = ModuleType(name)
+        package.__path__ = [str(PACKAGE)]
+        utils = modules[f"{name}.utils"] = ModuleType(f"{name}.utils")
+        utils.__path__ = [str(PACKAGE / "utils")]
+        disk_cache = import_module(f"{name}.utils.disk_cache")
+        utils.DiskCache = disk_cache.DiskCache
+        utils.default_cache_directory = disk_cache.default_cache_directory
+    return import_module(f"{name}.http_loader")
@@ -0,0 +1,31 @@
+from asyncio import run, sleep
+
+
+def test_conversion_errors_reject_the_promise(chakra, monkeypatch):
+    from python_chakra import index
+    from python_chakra.dll_wrapper import JSValueRef
+
+    settled = []
+    monkeypatch.setattr(index, "call",
+                        lambda function, value: settled.append(
+                            (function, value)))
+    monkeypatch.setattr(index, "_error_from_exception", lambda ex: ex)
+    resolve, reject = JSValueRef(), JSValueRef()
+
+    async def result():
+        return object()
+
+    def convert(value):
+        raise TypeError("can't convert")
+
+    async def main():
+        assert index._settle_later(result(), JSValueRef(), resolve, reject,
+                                   convert)
+        # The task finishes, then its done callback runs
+        for _ in range(3):
+            await sleep(0)
+
+    run(main())
+    [(function, value)] = settled
+    assert function is reject
+    assert type(value) is TypeError
@@ -0,0 +1,48 @@
+from ctypes import c_char_p, c_void_p, cast, memmove
+
+import pytest
+
+
+@pytest.fixture
+def created(chakra, monkeypatch):
+    """
+    Records addresses handed to `JsCreateExternalArrayBuffer`
+    """
+    from python_chakra import dll_wrapper
+
+    addresses = []
+
+    def create(address, length, finalizer, token, result):
+        addresses.append(address)
+        return 0
+
+    monkeypatch.setattr(dll_wrapper.chakra_core,
+                        "JsCreateExternalArrayBuffer", create)
+    return addresses
+
+
+def test_bytes_are_copied_for_scripts(chakra, created):
+    from python_chakra.dll_wrapper import wrap_buffer
+
+    data = b"shared constant"
+    wrap_buffer(data)
+    assert created[0] != cast(c_char_p(data), c_void_p).value
+    memmove(created[0], b"X", 1)
+    assert data == b"shared constant"
+
+
+def test_read_only_views_are_copied(chakra, created):
+    from python_chakra.dll_wrapper import wrap_buffer
+
+    data = bytearray(b"data")
+    wrap_buffer(memoryview(data).toreadonly())
+    memmove(created[0], b"X", 1)
+    assert data == b"data"
+
+
+def test_script_sources_are_shared(chakra, created):
+    from python_chakra.dll_wrapper import create_external_array_buffer
+
+    source = b"1 + 1"
+    create_external_array_buffer(source)
+    assert created[0] == cast(c_char_p(source), c_void_p).value
@@ -0,0 +1,26 @@
+from ctypes import addressof, create_string_buffer
+
+
+def test_rejected_entry_is_replaced(chakra, tmp_path, monkeypatch):
+    from python_chakra import bytecode_cache
+
+    monkeypatch.setattr(bytecode_cache, "_engine_id", lambda: "test")
+    cache = bytecode_cache.BytecodeCache(str(tmp_path))
+    key = cache.key(b"1", 0x20)
+    cache.write(key, b"stale")
+    fresh = create_string_buffer(b"fresh", 5)
+
+    def reject(*_):
+        raise bytecode_cache.BadSerializedScriptError("stale")
+
+    monkeypatch.setattr(bytecode_cache, "create_external_array_buffer",
+                        lambda data: data)
+    monkeypatch.setattr(bytecode_cache, "run_serialized", reject)
+    monkeypatch.setattr(bytecode_cache, "serialize_script",
+                        lambda script, attributes: fresh)
+    monkeypatch.setattr(bytecode_cache, "get_array_buffer_storage",
+                        lambda buffer: (addressof(buffer), len(buffer)))
+    monkeypatch.setattr(bytecode_cache, "run_script",
+                        lambda script, filename, attributes: "parsed")
+    assert cache.run(b"1", "test.js", 0x20) == "parsed"
+    assert cache.read(key) == b"fresh"
@@ -0,0 +1,83 @@
+from importlib import import_module
+from json import dumps, loads
+from math import inf, nan
+
+import pytest
+
+
+@pytest.mark.parametrize("key", ["a", 1, -1, 1.5, 1.0, inf, -inf, True,
+                                 False, None])
+def test_property_keys_match_json(chakra, key):
+    from python_chakra.convert import _property_key
+
+    # Objects built through JSON get the keys of `json.dumps`
+    assert str(_property_key(key)) == next(iter(loads(dumps({key: 0}))))
+
+
+def test_nan_key(chakra):
+    from python_chakra.convert import _property_key
+
+    assert _property_key(nan) == "NaN"
+
+
+def test_unsupported_key(chakra):
+    from python_chakra.convert import _property_key
+
+    with pytest.raises(TypeError, match="tuple"):
+        _property_key((1, 2))
+
+
+@pytest.mark.parametrize("backend", ["dll_wrapper", "cffi_wrapper"])
+def test_to_double_of_python_numbers(chakra, backend):
+    if backend == "cffi_wrapper":
+        pytest.importorskip("cffi")
+    backend = import_module(f"python_chakra.{backend}")
+    # Both backends return python numbers without calling the engine
+    assert backend.to_double(3) == 3.0
+    assert type(backend.to_double(3)) is float
+    assert backend.to_double(0.25) == 0.25
+
+
+@pytest.fixture
+def pins(chakra, monkeypatch):
+    """
+    Engine pin counts by address, `to_js` builds a single value
+    """
+    from python_chakra import convert
+    from python_chakra.dll_wrapper import JSValueRef, chakra_core
+
+    counts = {}
+
+    def add_ref(address, _):
+        counts[address] = counts.get(address, 0) + 1
+        return 0
+
+    def release(address, _):
+        counts[address] -= 1
+        return 0
+
+    class Builder:
+        def __init__(self, scope, parse_threshold):
+            self.scope = scope
+
+        def build(self, value):
+            return self.scope.add(JSValueRef(0x10))
+
+    monkeypatch.setattr(chakra_core, "JsAddRef", add_ref)
+    monkeypatch.setattr(chakra_core, "JsRelease", release)
+    monkeypatch.setattr(convert, "Builder", Builder)
+    return counts
+
+
+def test_to_js_without_scope_is_not_pinned(chakra, pins):
+    chakra.to_js({})
+    assert pins[0x10] == 0
+
+
+def test_to_js_result_is_pinned_in_outer_scope(chakra, pins):
+    from python_chakra.dll_wrapper import HandleScope
+
+    with HandleScope():
+        chakra.to_js({})
+        assert pins[0x10] == 1
+    assert pins[0x10] == 0
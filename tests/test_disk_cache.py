@@ -0,0 +1,38 @@
+from os import listdir
+from threading import Thread
+
+
+def test_concurrent_writes_of_one_entry(standalone, tmp_path):
+    cache = standalone.DiskCache(str(tmp_path), max_size=2 ** 30)
+
+    def write(fill: int) -> None:
+        for _ in range(50):
+            cache.write("entry", bytes([fill]) * 100_000)
+
+    threads = [Thread(target=write, args=(fill,)) for fill in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    data = cache.read("entry")
+    assert len(data) == 100_000 and len(set(data)) == 1
+    assert listdir(tmp_path) == ["entry"]
+
+
+def test_concurrent_evictions(standalone, tmp_path):
+    cache = standalone.DiskCache(str(tmp_path), max_size=50_000)
+    errors = []
+
+    def write(thread: int) -> None:
+        try:
+            for i in range(200):
+                cache.write(f"{thread}-{i}", bytes(10_000))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [Thread(target=write, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
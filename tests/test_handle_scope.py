@@ -0,0 +1,109 @@
+from ctypes import CFUNCTYPE, c_void_p
+
+import pytest
+
+# Conservative stack scanning may keep a few values alive
+SLACK = 10
+
+
+@pytest.fixture
+def pins(chakra, monkeypatch):
+    """
+    Engine pin counts by address
+    """
+    from python_chakra.dll_wrapper import chakra_core
+
+    counts = {}
+
+    def add_ref(ref, _):
+        address = getattr(ref, "value", ref)
+        counts[address] = counts.get(address, 0) + 1
+        return 0
+
+    def release(ref, _):
+        counts[getattr(ref, "value", ref)] -= 1
+        return 0
+
+    monkeypatch.setattr(chakra_core, "JsAddRef", add_ref)
+    monkeypatch.setattr(chakra_core, "JsRelease", release)
+    return counts
+
+
+def test_escape_from_inactive_scope(chakra):
+    from python_chakra.dll_wrapper import HandleScope, JSValueRef
+
+    with pytest.raises(RuntimeError):
+        HandleScope().escape(JSValueRef())
+
+
+def test_handles_are_released_on_exit(pins):
+    from python_chakra.dll_wrapper import HandleScope, JSValueRef
+
+    with HandleScope() as scope:
+        for address in range(1, 4):
+            scope.add(JSValueRef(address))
+        assert pins == {1: 1, 2: 1, 3: 1}
+        assert len(scope) == 3
+    assert pins == {1: 0, 2: 0, 3: 0}
+    assert len(scope) == 0
+
+
+def test_escape_moves_handle_to_outer_scope(pins):
+    from python_chakra.dll_wrapper import HandleScope, JSValueRef, \
+        handle_scopes
+
+    with HandleScope() as outer:
+        with HandleScope() as inner:
+            assert handle_scopes[-2:] == [outer, inner]
+            inner.add(JSValueRef(1))
+            inner.add(JSValueRef(2))
+            inner.escape(JSValueRef(2))
+        assert handle_scopes[-1] is outer
+        assert pins == {1: 0, 2: 1}
+        assert list(outer.handles) == [2]
+    assert pins == {1: 0, 2: 0}
+
+
+def test_escape_from_outermost_scope_pins(pins):
+    from python_chakra.dll_wrapper import HandleScope, JSValueRef
+
+    with HandleScope() as scope:
+        scope.escape(scope.add(JSValueRef(1)))
+    # Until `js_release`
+    assert pins == {1: 1}
+
+
+def test_scopes_with_engine(chakra):
+    from python_chakra.dll_wrapper import JSValueRef, create_object, \
+        set_before_collect_callback
+
+    collected = set()
+
+    @CFUNCTYPE(None, c_void_p, c_void_p)
+    def on_collect(address, _):
+        collected.add(address)
+
+    def create(scope, count):
+        addresses = set()
+        for _ in range(count):
+            ref = scope.add(create_object())
+            set_before_collect_callback(ref, on_collect)
+            addresses.add(ref.value)
+        return addresses
+
+    with chakra.JSRuntime() as runtime:
+        with runtime.handle_scope():
+            with runtime.handle_scope() as inner:
+                temporaries = create(inner, 100)
+                escaped = create(inner, 100)
+                for address in escaped:
+                    inner.escape(JSValueRef(address))
+                runtime.collect_garbage()
+                # Everything is pinned while the scope is active
+                assert not collected
+            runtime.collect_garbage()
+            # Released in one sweep, escaped handles live in `outer`
+            assert len(temporaries - collected) <= SLACK
+            assert not escaped & collected
+        runtime.collect_garbage()
+        assert len(escaped - collected) <= SLACK
@@ -0,0 +1,78 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # path -> (Cache-Control, ETag)
+    resources = {
+        "/fresh.js": ("max-age=60", '"fresh"'),
+        "/revalidated.js": ("no-cache", '"revalidated"'),
+    }
+
+    def do_GET(self) -> None:
+        self.server.log.append((self.path, self.client_address,
+                                self.headers.get("If-None-Match")))
+        cache_control, etag = self.resources[self.path]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = f"export default {self.path!r};".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/javascript; charset=utf-8")
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.log = []
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_pooled_and_cached(standalone, server, tmp_path):
+    HTTPCache, HTTPLoader = standalone.HTTPCache, standalone.HTTPLoader
+    base = f"http://127.0.0.1:{server.server_port}"
+    with HTTPLoader(HTTPCache(str(tmp_path))) as loader:
+        first = loader.fetch(f"{base}/fresh.js")
+        assert loader.fetch(f"{base}/fresh.js") == first
+        # Fresh entries are served without a request
+        assert [path for path, _, _ in server.log] == ["/fresh.js"]
+        body = loader.fetch(f"{base}/revalidated.js")
+        assert loader.fetch(f"{base}/revalidated.js") == body
+    paths, clients, validators = zip(*server.log)
+    assert paths == ("/fresh.js", "/revalidated.js", "/revalidated.js")
+    # Stale entries are revalidated with their ETag and answered with 304
+    assert validators == (None, None, '"revalidated"')
+    # All requests went over one kept-alive connection
+    assert len(set(clients)) == 1
+
+
+def test_offline(standalone, server, tmp_path):
+    HTTPCache, HTTPLoader = standalone.HTTPCache, standalone.HTTPLoader
+    base = f"http://127.0.0.1:{server.server_port}"
+    cache = HTTPCache(str(tmp_path))
+    with HTTPLoader(cache) as loader:
+        body = loader.fetch(f"{base}/revalidated.js")
+    with HTTPLoader(cache, offline=True) as loader:
+        # Stale entries are served as they are
+        assert loader.fetch(f"{base}/revalidated.js") == body
+        with pytest.raises(standalone.OfflineError):
+            loader.fetch(f"{base}/fresh.js")
+    assert len(server.log) == 1
@@ -0,0 +1,14 @@
+def test_import(chakra):
+    assert chakra.__version__
+    for name in ("JSRuntime", "Object", "Number", "Promise", "jsfunc",
+                 "to_js", "to_python", "ArrayBuffer", "TypedArray"):
+        assert hasattr(chakra, name), name
+
+
+def test_wrappers_are_weakly_referenceable(chakra):
+    from weakref import ref
+
+    assert "__weakref__" not in chakra.Object.__slots__
+    # `_track` relies on finalizers of every wrapper
+    ref(chakra.index.Object.__new__(chakra.Object))
+    ref(chakra.index.Number(1))
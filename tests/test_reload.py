@@ -0,0 +1,89 @@
+from asyncio import run, wait_for
+
+import pytest
+
+
+class FakeModule:
+    def __init__(self, spec: str, root: bool) -> None:
+        self.fullpath = spec
+        self.root = root
+        self.disposed = False
+        self._as_parameter_ = type("Record", (), {"value": id(self)})()
+
+    def dispose(self) -> None:
+        self.disposed = True
+
+
+@pytest.fixture
+def runtime(chakra):
+    from python_chakra.modules import ModuleRuntime
+
+    class Runtime(ModuleRuntime):
+        # Instance attributes replace `fetch`, `exec_root`, ...
+        pass
+
+    runtime = Runtime(None)
+    runtime.add_module("file:///main.js", FakeModule("file:///main.js", True))
+    runtime.add_module("file:///dep.js", FakeModule("file:///dep.js", False))
+    runtime.modules.add_edge("file:///main.js", "file:///dep.js")
+    return runtime
+
+
+def test_failed_fetch_keeps_old_modules(runtime):
+    def fetch(spec):
+        raise FileNotFoundError(spec)
+
+    runtime.fetch = fetch
+    old = list(runtime.modules.values())
+    with pytest.raises(FileNotFoundError):
+        runtime.reload(["file:///dep.js"])
+    assert list(runtime.modules.values()) == old
+    assert not any(module.disposed for module in old)
+
+
+def test_failed_parse_restores_old_graph(runtime):
+    def exec_root(spec):
+        module = FakeModule(str(spec), True)
+        runtime.add_module(str(spec), module)
+        created.append(module)
+        raise SyntaxError("half-saved")
+
+    created = []
+    runtime.fetch = lambda spec: b""
+    runtime.exec_root = exec_root
+    old = runtime.modules.get("file:///main.js")
+    with pytest.raises(SyntaxError):
+        runtime.reload(["file:///dep.js"])
+    assert runtime.modules.get("file:///main.js") is old
+    assert runtime.modules.importers("file:///dep.js") == {"file:///main.js"}
+    assert not old.disposed
+    assert created[0].disposed
+
+
+def test_successful_reload_disposes_old_modules(runtime):
+    runtime.fetch = lambda spec: b""
+    runtime.exec_root = lambda spec: runtime.add_module(
+        str(spec), FakeModule(str(spec), True))
+    old = list(runtime.modules.values())
+    assert runtime.reload(["file:///dep.js"]) == {"file:///main.js",
+                                                  "file:///dep.js"}
+    assert all(module.disposed for module in old)
+
+
+def test_watch_survives_reload_errors(runtime, capsys):
+    calls = []
+
+    def reload_changed():
+        calls.append(None)
+        raise OSError("mid-save")
+
+    runtime.reload_changed = reload_changed
+
+    async def main():
+        watcher = runtime.watch(0)
+        with pytest.raises(TimeoutError):
+            await wait_for(watcher, 0.05)
+
+    run(main())
+    assert len(calls) > 1
+    assert "mid-save" in capsys.readouterr().out